@@ -0,0 +1,60 @@
+"""
+Сравнение синхронных и асинхронных представлений под ASGI.
+
+Для каждого уровня параллельности http_load.py запускается дважды
+в отдельных процессах: с DJANGO_ASYNC_VIEWS=0 (синхронные
+представления в общем потоке sync_to_async) и с DJANGO_ASYNC_VIEWS=1
+(представления в пуле потоков).
+
+Запуск из корня репозитория:
+    python benchmarks/asgi_views.py --project ya_news --concurrency 1 8 32
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from common import PROJECTS
+
+ROUTES = {
+    'ya_news': ('news:home', 'news:detail'),
+    'ya_note': ('notes:list', 'notes:detail'),
+}
+
+
+def run(project, async_views, concurrency, requests):
+    env = dict(os.environ, DJANGO_ASYNC_VIEWS=str(int(async_views)))
+    output = subprocess.run(
+        [sys.executable, str(Path(__file__).with_name('http_load.py')),
+         '--project', project, '--server', 'asgi',
+         '--concurrency', str(concurrency), '--requests', str(requests),
+         '--routes', *ROUTES[project]],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output)['routes']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--project', choices=PROJECTS, default='ya_news')
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=(1, 8, 32))
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+    print(f'{"маршрут":<16} {"потоков":>7} {"sync rps":>9} {"async rps":>10}'
+          f' {"sync p99":>9} {"async p99":>10}')
+    for concurrency in args.concurrency:
+        before = run(args.project, False, concurrency, args.requests)
+        after = run(args.project, True, concurrency, args.requests)
+        for sync, async_ in zip(before, after):
+            name = f'{sync["method"]} {sync["route"]}'
+            print(f'{name:<16} {concurrency:>7} '
+                  f'{sync["throughput_rps"]:>9} {async_["throughput_rps"]:>10}'
+                  f' {sync["latency_ms"]["p99"]:>9} '
+                  f'{async_["latency_ms"]["p99"]:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+SQL-запросы и время одного запроса авторизованного пользователя
+при разных способах хранения сессии и с кэшем пользователей и без него.
+
+Страница запрашивается через django.test.Client, настройки сессий
+и кэша пользователей меняются через override_settings. База —
+временный файл SQLite, наполненный командой seed_load.
+
+Запуск из корня репозитория:
+    python benchmarks/auth_queries.py --project ya_note
+    python benchmarks/auth_queries.py --project ya_news
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import PROJECTS, setup_django
+from http_load import prepare_news, prepare_notes
+
+ROUTES = {
+    'ya_news': 'news:detail',
+    'ya_note': 'notes:list',
+}
+
+SESSIONS = 'django.contrib.sessions.backends.'
+
+CONFIGURATIONS = (
+    ('db, без кэша', SESSIONS + 'db', 0),
+    ('cached_db, без кэша', SESSIONS + 'cached_db', 0),
+    ('cached_db + кэш', SESSIONS + 'cached_db', 30),
+    ('signed_cookies + кэш', SESSIONS + 'signed_cookies', 30),
+)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--project', choices=PROJECTS, default='ya_note')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--news', type=int, default=1_000)
+    parser.add_argument('--comments', type=int, default=10_000)
+    parser.add_argument('--notes', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(
+            args.project,
+            DEBUG=False,
+            ALLOWED_HOSTS=['testserver'],
+            DATABASES={'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+            }},
+            # Построчный лог запросов исказил бы замер.
+            LOGGING={'version': 1, 'disable_existing_loggers': False},
+            # Временная база удаляется раньше завершения процесса.
+            NEWS_VIEWS_FLUSH_AT_EXIT=False,
+        )
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test import Client, override_settings
+        call_command('migrate', verbosity=0)
+        if args.project == 'ya_news':
+            user, routes = prepare_news(args)
+        else:
+            user, routes = prepare_notes(args)
+        route = next(
+            route for route in routes
+            if route.name == ROUTES[args.project] and route.method == 'GET'
+        )
+        print(f'GET {route.name}, {args.requests} запросов')
+        print(f'{"конфигурация":<22} {"запросов SQL":>12} {"мс":>7}')
+        for name, engine, timeout in CONFIGURATIONS:
+            with override_settings(
+                SESSION_ENGINE=engine, AUTH_USER_CACHE_TIMEOUT=timeout
+            ):
+                client = Client()
+                client.force_login(user)
+                client.get(route.path)
+                counter = QueryCounter()
+                started = time.perf_counter()
+                with connection.execute_wrapper(counter):
+                    for _ in range(args.requests):
+                        response = client.get(route.path)
+                        assert response.status_code == 200
+                elapsed = time.perf_counter() - started
+            print(f'{name:<22} {counter.count / args.requests:>12.1f} '
+                  f'{elapsed / args.requests * 1000:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Отрисовка длинной ветки комментариев с кэшем фрагментов и без него.
+
+Все комментарии новости выводятся одной страницей news/comments.html.
+Сравниваются прежний шаблон, который для каждого комментария
+выполняет linebreaksbr, и новый: с пустым кэшем фрагментов и с уже
+заполненным. Читатель — автор каждого сотого комментария, поэтому
+часть ссылок на редактирование отрисовывается всегда. Комментарии
+читаются из базы один раз, замеряется только работа шаблонов и кэша.
+Кэш — LocMemCache, вмещающий все фрагменты, база — временный файл
+SQLite.
+
+Запуск из корня репозитория:
+    python benchmarks/comment_fragments.py --comments 10000
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import setup_django, timeit
+
+OLD_TEMPLATE = '''{% for comment in comments_page.object_list %}
+  <div>
+    <b>{{ comment.author }}</b>, {{ comment.created }}</b>
+    <p class="mb-0">{{ comment.text|linebreaksbr }}</p>
+    {% if comment.author == user %}
+      <a href="{% url 'news:edit' comment.pk %}">Редактировать</a> |
+      <a href="{% url 'news:delete' comment.pk %}">Удалить</a>
+    {% endif %}
+  </div>
+  <br>
+{% endfor %}'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--comments', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(
+            'ya_news',
+            DEBUG=False,
+            DATABASES={'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+            }},
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'OPTIONS': {'MAX_ENTRIES': args.comments * 2},
+            }},
+        )
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from django.template import engines
+        from django.template.loader import render_to_string
+        from news.fragments import render_fragments
+        from news.models import Comment, News
+        from news.pagination import CursorPage
+        call_command('migrate', verbosity=0)
+        get_user_model().objects.bulk_create(
+            get_user_model()(username=f'Читатель {number}')
+            for number in range(args.users)
+        )
+        users = list(get_user_model().objects.all())
+        news = News.objects.create(title='Новость', text='Текст')
+        Comment.objects.bulk_create(
+            Comment(
+                news=news,
+                author=users[number % args.users],
+                text=f'Комментарий {number}\nВторая строка\n\nАбзац',
+            )
+            for number in range(args.comments)
+        )
+        comments = list(
+            Comment.objects.filter(news=news).select_related('author')
+        )
+        context = {
+            'comments_page': CursorPage(comments),
+            'news_pk': news.pk,
+            'user': users[0],
+        }
+        old_template = engines['django'].from_string(OLD_TEMPLATE)
+
+        def old():
+            old_template.render(context)
+
+        def new():
+            render_fragments(comments)
+            render_to_string('news/comments.html', context)
+
+        def cold():
+            cache.clear()
+            new()
+
+        results = (
+            ('прежний шаблон', timeit(old)),
+            ('пустой кэш', timeit(cold)),
+            ('заполненный кэш', timeit(new)),
+        )
+        print(f'{args.comments} комментариев')
+        print(f'{"вариант":<16} {"мс":>8}')
+        for name, elapsed in results:
+            print(f'{name:<16} {elapsed * 1000:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
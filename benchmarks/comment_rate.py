@@ -0,0 +1,84 @@
+"""
+Цена ограничения частоты комментариев, когда лимит не превышен.
+
+Сначала замеряется сама проверка news.throttling.hit() для лимитов
+по пользователю и по IP-адресу, затем отправка комментария через
+django.test.Client с выключенным ограничением и с включённым,
+но заведомо не достигаемым лимитом. Кэш — LocMemCache из настроек
+проекта, база — временный файл SQLite.
+
+Запуск из корня репозитория:
+    python benchmarks/comment_rate.py --requests 500
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import setup_django, timeit
+
+CONFIGURATIONS = (
+    ('без ограничения', 0, 0),
+    ('с ограничением', 10 ** 9, 10 ** 9),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--checks', type=int, default=100_000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(
+            'ya_news',
+            DEBUG=False,
+            ALLOWED_HOSTS=['testserver'],
+            DATABASES={'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+            }},
+            # Построчный лог запросов исказил бы замер.
+            LOGGING={'version': 1, 'disable_existing_loggers': False},
+        )
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+        from django.test import Client, override_settings
+        from django.urls import reverse
+        from news.models import News
+        from news.throttling import hit
+        call_command('migrate', verbosity=0)
+        limits = [('user:1', 10 ** 9), ('ip:127.0.0.1', 10 ** 9)]
+
+        def check():
+            for _ in range(args.checks):
+                hit(limits, 60)
+
+        elapsed = timeit(check, repeat=3)
+        print(f'hit(), два лимита: '
+              f'{elapsed / args.checks * 1_000_000:.1f} мкс')
+
+        user = get_user_model().objects.create(username='Читатель')
+        news = News.objects.create(title='Новость', text='Текст')
+        url = reverse('news:detail', args=(news.pk,))
+        print(f'POST news:detail, {args.requests} запросов')
+        print(f'{"конфигурация":<16} {"мс":>7}')
+        for name, user_limit, ip_limit in CONFIGURATIONS:
+            with override_settings(
+                NEWS_COMMENT_RATE_USER=user_limit,
+                NEWS_COMMENT_RATE_IP=ip_limit,
+            ):
+                client = Client()
+                client.force_login(user)
+                client.post(url, data={'text': 'Прогрев'})
+                started = time.perf_counter()
+                for number in range(args.requests):
+                    response = client.post(
+                        url, data={'text': f'Комментарий {number}'}
+                    )
+                    assert response.status_code == 302
+                elapsed = time.perf_counter() - started
+            print(f'{name:<16} {elapsed / args.requests * 1000:>7.3f}')
+
+
+if __name__ == '__main__':
+    main()
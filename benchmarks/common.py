@@ -0,0 +1,44 @@
+"""Общие помощники для скриптов замеров производительности."""
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROJECTS = {
+    'ya_news': 'yanews.settings',
+    'ya_note': 'yanote.settings',
+}
+
+
+def use_project(project):
+    """Добавляет каталог проекта в sys.path для импорта его модулей."""
+    path = str(BASE_DIR / project)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def setup_django(project, **overrides):
+    """
+    Настраивает Django для проекта ya_news или ya_note.
+
+    overrides заменяют одноимённые настройки проекта до django.setup().
+    """
+    use_project(project)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', PROJECTS[project])
+    import django
+    from django.conf import settings
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+
+
+def timeit(func, repeat=5):
+    """Лучшее время из repeat запусков func в секундах."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,445 @@
+"""
+Нагрузочный замер маршрутов ya_news и ya_note.
+
+Запросы подаются прямо в WSGI- или ASGI-приложение проекта
+(yanews.wsgi, yanote.asgi, …) внутри процесса, без сетевого стека.
+База — временный файл SQLite, заполненный командой seed_load.
+Для каждого маршрута считаются пропускная способность, гистограмма
+и процентили задержки, число SQL-запросов на запрос и, с --memory,
+объём памяти, выделяемой одним запросом. Отчёт выводится в JSON,
+чтобы результаты разных коммитов можно было сравнивать.
+
+Запуск из корня репозитория:
+    python benchmarks/http_load.py --project ya_news --concurrency 8
+    python benchmarks/http_load.py --project ya_note --server asgi \\
+        --notes 100000 --output note.json
+"""
+import argparse
+import asyncio
+import importlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+from urllib.parse import urlencode
+
+from common import BASE_DIR, PROJECTS, setup_django
+
+# Верхние границы корзин гистограммы задержек, мс.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Route:
+    """Маршрут под нагрузкой: метод, путь и тело запроса."""
+
+    def __init__(self, name, method, path, data=None, auth=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.auth = auth
+
+    @property
+    def label(self):
+        return f'{self.method} {self.name}'
+
+    def body(self, number):
+        if self.data is None:
+            return b''
+        return urlencode(self.data(number)).encode()
+
+
+def news_routes(news_pk, comment_pk):
+    from django.urls import reverse
+    detail = reverse('news:detail', args=(news_pk,))
+    return [
+        Route('news:home', 'GET', reverse('news:home')),
+        Route('news:detail', 'GET', detail),
+        Route('news:detail', 'POST', detail, auth=True,
+              data=lambda number: {'text': f'Комментарий {number}'}),
+        Route('news:edit', 'GET',
+              reverse('news:edit', args=(comment_pk,)), auth=True),
+        Route('news:delete', 'GET',
+              reverse('news:delete', args=(comment_pk,)), auth=True),
+    ]
+
+
+def note_routes(slug):
+    from django.urls import reverse
+    prefix = f'bench-{time.time_ns():x}'
+    return [
+        Route('notes:list', 'GET', reverse('notes:list'), auth=True),
+        Route('notes:add', 'POST', reverse('notes:add'), auth=True,
+              data=lambda number: {'title': f'Заметка {number}',
+                                   'text': 'Текст заметки',
+                                   'slug': f'{prefix}-{number}'}),
+        Route('notes:detail', 'GET',
+              reverse('notes:detail', args=(slug,)), auth=True),
+    ]
+
+
+def prepare_news(args):
+    from django.core.management import call_command
+    from news.models import Comment, News
+    call_command('seed_load', users=args.users, news=args.news,
+                 comments=args.comments, seed=args.seed, verbosity=0,
+                 stdout=io.StringIO())
+    news = News.objects.order_by('-comments_count', '-pk').first()
+    comment = Comment.objects.filter(news=news).select_related(
+        'author'
+    ).first()
+    if comment is None:
+        raise SystemExit('В наборе данных нет комментариев.')
+    return comment.author, news_routes(news.pk, comment.pk)
+
+
+def prepare_notes(args):
+    from django.core.management import call_command
+    from notes.models import Note
+    call_command('seed_load', users=args.users, notes=args.notes,
+                 seed=args.seed, verbosity=0, stdout=io.StringIO())
+    note = Note.objects.select_related('author').order_by('pk').first()
+    return note.author, note_routes(note.slug)
+
+
+def session_cookies(user):
+    """Cookie сессии пользователя и CSRF-токен для POST-запросов."""
+    from django.conf import settings
+    from django.http import HttpRequest
+    from django.middleware.csrf import get_token
+    from django.test import Client
+    client = Client()
+    client.force_login(user)
+    session = client.cookies[settings.SESSION_COOKIE_NAME].value
+    request = HttpRequest()
+    token = get_token(request)
+    secret = request.META['CSRF_COOKIE']
+    return token, {
+        settings.SESSION_COOKIE_NAME: session,
+        settings.CSRF_COOKIE_NAME: secret,
+    }
+
+
+class QueryRecorder:
+    """Запоминает число SQL-запросов в окружении каждого запроса."""
+
+    KEY = 'benchmark.queries'
+
+    def __call__(self, sender, request, count, **kwargs):
+        meta = getattr(request, 'scope', None) or request.environ
+        meta[self.KEY] = count
+
+
+class Driver:
+    """Выполняет запросы к WSGI- или ASGI-приложению проекта."""
+
+    def __init__(self, project, server, token, cookies):
+        module = PROJECTS[project].rsplit('.', 1)[0]
+        self.application = importlib.import_module(
+            f'{module}.{server}'
+        ).application
+        self.server = server
+        self.token = token
+        self.cookies = '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+    def headers(self, route, body):
+        headers = {'host': 'testserver'}
+        if route.auth:
+            headers['cookie'] = self.cookies
+        if route.method == 'POST':
+            headers['content-type'] = 'application/x-www-form-urlencoded'
+            headers['content-length'] = str(len(body))
+            headers['x-csrftoken'] = self.token
+        return headers
+
+    def wsgi_request(self, route, body):
+        environ = {
+            'REQUEST_METHOD': route.method,
+            'PATH_INFO': route.path,
+            'QUERY_STRING': '',
+            'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in self.headers(route, body).items():
+            name = name.upper().replace('-', '_')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            environ[name] = value
+        status = []
+
+        def start_response(line, headers, exc_info=None):
+            status.append(int(line.split(' ', 1)[0]))
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return status[0], environ.get(QueryRecorder.KEY)
+
+    async def asgi_request(self, route, body):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': route.method,
+            'scheme': 'http',
+            'path': route.path,
+            'raw_path': route.path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (name.encode(), value.encode())
+                for name, value in self.headers(route, body).items()
+            ],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': body,
+                    'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+
+        await self.application(scope, receive, send)
+        return status[0], scope.get(QueryRecorder.KEY)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def histogram(latencies):
+    counts = dict.fromkeys([f'<={bound}' for bound in BUCKETS], 0)
+    counts[f'>{BUCKETS[-1]}'] = 0
+    for latency in latencies:
+        for bound in BUCKETS:
+            if latency <= bound:
+                counts[f'<={bound}'] += 1
+                break
+        else:
+            counts[f'>{BUCKETS[-1]}'] += 1
+    return counts
+
+
+def summarize(route, samples, elapsed):
+    latencies = [latency for latency, _, _ in samples]
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    queries = [number for _, _, number in samples if number is not None]
+    return {
+        'route': route.name,
+        'method': route.method,
+        'path': route.path,
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'statuses': statuses,
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies), 3),
+            'p50': round(percentile(latencies, 0.5), 3),
+            'p90': round(percentile(latencies, 0.9), 3),
+            'p99': round(percentile(latencies, 0.99), 3),
+            'max': round(max(latencies), 3),
+        },
+        'histogram_ms': histogram(latencies),
+        'queries_per_request': {
+            'mean': round(statistics.mean(queries), 2) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+    }
+
+
+def run_wsgi(driver, route, requests, concurrency, numbers):
+    def one(_):
+        body = route.body(next(numbers))
+        started = time.perf_counter()
+        status, queries = driver.wsgi_request(route, body)
+        return (time.perf_counter() - started) * 1000, status, queries
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(one, range(requests)))
+
+
+def run_asgi(driver, route, requests, concurrency, numbers):
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            body = route.body(next(numbers))
+            async with semaphore:
+                started = time.perf_counter()
+                status, queries = await driver.asgi_request(route, body)
+                return (time.perf_counter() - started) * 1000, status, queries
+
+        return await asyncio.gather(*(one() for _ in range(requests)))
+
+    return asyncio.run(main())
+
+
+def measure_memory(driver, route, samples, numbers):
+    """Средний пик памяти Python на один последовательный запрос, КиБ."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            body = route.body(next(numbers))
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            if driver.server == 'asgi':
+                asyncio.run(driver.asgi_request(route, body))
+            else:
+                driver.wsgi_request(route, body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        'samples': samples,
+        'peak_kib_mean': round(statistics.mean(peaks) / 1024, 1),
+        'peak_kib_max': round(max(peaks) / 1024, 1),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--project', choices=PROJECTS, default='ya_news')
+    parser.add_argument('--server', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Число запросов на каждый маршрут.')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--routes', nargs='+',
+                        help='Имена маршрутов, например news:home.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--news', type=int, default=1_000)
+    parser.add_argument('--comments', type=int, default=10_000)
+    parser.add_argument('--notes', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--memory', type=int, default=0, metavar='N',
+                        help='Замерить память на N запросах маршрута.')
+    parser.add_argument('--output', type=Path,
+                        help='Файл для отчёта, по умолчанию stdout.')
+    args = parser.parse_args()
+
+    if args.server == 'asgi':
+        # Как в asgi.py проектов; переменная должна быть задана
+        # до загрузки настроек.
+        os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django(
+            args.project,
+            DEBUG=False,
+            ALLOWED_HOSTS=['testserver'],
+            DATABASES={'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+                'OPTIONS': {'timeout': 60},
+            }},
+            # Построчный лог запросов исказил бы замер.
+            LOGGING={'version': 1, 'disable_existing_loggers': False},
+            # Временная база удаляется раньше завершения процесса.
+            NEWS_VIEWS_FLUSH_AT_EXIT=False,
+            # Замеряется запись комментариев, а не ответ 429
+            # ограничителя частоты. В ya_note этих настроек нет.
+            NEWS_COMMENT_RATE_USER=0,
+            NEWS_COMMENT_RATE_IP=0,
+        )
+        from django.conf import settings
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        if args.project == 'ya_news':
+            user, routes = prepare_news(args)
+        else:
+            user, routes = prepare_notes(args)
+        if args.routes:
+            routes = [route for route in routes if route.name in args.routes]
+        token, cookies = session_cookies(user)
+        driver = Driver(args.project, args.server, token, cookies)
+        middleware = importlib.import_module(
+            PROJECTS[args.project].split('.')[0] + '.middleware'
+        )
+        recorder = QueryRecorder()
+        middleware.view_queries.connect(recorder)
+        run = run_asgi if args.server == 'asgi' else run_wsgi
+        # next() у itertools.count атомарен, счётчик общий для потоков.
+        numbers = count()
+        results = []
+        for route in routes:
+            run(driver, route, args.warmup, args.concurrency, numbers)
+            started = time.perf_counter()
+            samples = run(
+                driver, route, args.requests, args.concurrency, numbers
+            )
+            result = summarize(route, samples, time.perf_counter() - started)
+            if args.memory:
+                result['memory'] = measure_memory(
+                    driver, route, args.memory, numbers
+                )
+            results.append(result)
+            print(f'{route.label}: {result["throughput_rps"]} rps, '
+                  f'p99 {result["latency_ms"]["p99"]} мс', file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'project': args.project,
+        'server': args.server,
+        'async_views': settings.ASYNC_VIEWS,
+        'concurrency': args.concurrency,
+        'requests_per_route': args.requests,
+        'dataset': (
+            {'users': args.users, 'news': args.news,
+             'comments': args.comments}
+            if args.project == 'ya_news'
+            else {'users': args.users, 'notes': args.notes}
+        ),
+        'python': sys.version.split()[0],
+        'routes': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Учёт просмотров новостей из нескольких потоков.
+
+Сравниваются UPDATE views = views + 1 на каждый просмотр и ViewCounter,
+который копит просмотры в памяти и записывает их пакетами.
+Просмотры распределены по новостям по закону Ципфа. База — временный
+файл SQLite, каждый поток работает со своим соединением.
+
+Запуск из корня репозитория:
+    python benchmarks/news_views.py --views 20000 --threads 8
+"""
+import argparse
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import setup_django
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith('UPDATE'):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--news', type=int, default=1000)
+    parser.add_argument('--views', type=int, default=20_000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django('ya_news', DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+            'OPTIONS': {'timeout': 60},
+        }})
+        from django.core.management import call_command
+        from django.db import connection, connections
+        from django.db.models import F, Sum
+        from news.counters import ViewCounter
+        from news.models import News
+        call_command('migrate', verbosity=0)
+        News.objects.bulk_create(
+            News(title=f'Новость {number}', text='Текст')
+            for number in range(args.news)
+        )
+        pks = list(News.objects.values_list('pk', flat=True))
+        rng = random.Random(args.seed)
+        weights = [1 / rank for rank in range(1, len(pks) + 1)]
+        views = rng.choices(pks, weights=weights, k=args.views)
+        chunks = [views[start::args.threads] for start in range(args.threads)]
+
+        def direct(pk):
+            News.objects.filter(pk=pk).update(views=F('views') + 1)
+
+        view_counter = ViewCounter()
+        print(f'{"способ":<12} {"просмотров/с":>13} {"UPDATE":>7}')
+        for name, add, flush in (
+            ('UPDATE +1', direct, None),
+            ('ViewCounter', view_counter.add, view_counter.flush),
+        ):
+            News.objects.update(views=0)
+            counter = QueryCounter()
+
+            def work(chunk):
+                try:
+                    with connection.execute_wrapper(counter):
+                        for pk in chunk:
+                            add(pk)
+                finally:
+                    connections.close_all()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(args.threads) as executor:
+                list(executor.map(work, chunks))
+            if flush:
+                with connection.execute_wrapper(counter):
+                    flush()
+            elapsed = time.perf_counter() - started
+            total = News.objects.aggregate(total=Sum('views'))['total']
+            assert total == args.views, total
+            print(f'{name:<12} {args.views / elapsed:>13.0f} '
+                  f'{counter.count:>7}')
+
+
+if __name__ == '__main__':
+    main()
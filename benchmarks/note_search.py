@@ -0,0 +1,112 @@
+"""
+Время поиска по заметкам автора с большим числом заметок.
+
+Заметки создаются со словарём, частоты слов в котором следуют
+закону Ципфа, как в обычных текстах. Запросы берутся из слов разной
+частоты: от самого частого до редких, для автора и для одного
+из других пользователей. Время растёт с числом совпадений: bm25
+вычисляется для каждой совпавшей заметки. База — временный файл
+SQLite.
+
+Запуск из корня репозитория:
+    python benchmarks/note_search.py --notes 100000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+from common import setup_django
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщэюя'
+RANKS = (1, 10, 100, 1000, 10000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100_000,
+                        help='Число заметок автора.')
+    parser.add_argument('--other-notes', type=int, default=100_000,
+                        help='Число заметок других пользователей.')
+    parser.add_argument('--vocabulary', type=int, default=30_000)
+    parser.add_argument('--words', type=int, default=60,
+                        help='Число слов в тексте заметки.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    vocabulary = list({
+        ''.join(rng.choices(ALPHABET, k=rng.randint(4, 10)))
+        for _ in range(args.vocabulary)
+    })
+    weights = list(accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)
+    ))
+
+    def words(count):
+        return ' '.join(rng.choices(vocabulary, cum_weights=weights, k=count))
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django('ya_note', DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+        }})
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.db import connection, transaction
+        from notes.models import Note, User
+        from notes.search import match_expression, query_stems, ranked_ids
+        call_command('migrate', verbosity=0)
+        author = User.objects.create(username='author')
+        User.objects.bulk_create(
+            User(username=f'user-{index}') for index in range(100)
+        )
+        others = list(User.objects.exclude(pk=author.pk))
+        started = time.perf_counter()
+        with transaction.atomic():
+            batch = []
+            for index in range(args.notes + args.other_notes):
+                owner = author if index < args.notes else rng.choice(others)
+                batch.append(Note(title=words(4), text=words(args.words),
+                                  slug=f'n{index}', author=owner))
+                if len(batch) == 5000:
+                    Note.objects.bulk_create(batch)
+                    batch = []
+            Note.objects.bulk_create(batch)
+        print(f'Заметки созданы за {time.perf_counter() - started:.1f} с')
+        queries = [(author, f'частота №{rank}', vocabulary[rank - 1])
+                   for rank in RANKS if rank <= len(vocabulary)]
+        queries.append(
+            (author, 'два слова', f'{vocabulary[50]} {vocabulary[300]}')
+        )
+        queries.append((others[0], 'другой, №1', vocabulary[0]))
+        print(f'{"запрос":<16} {"совпадений":>10} '
+              f'{"медиана":>9} {"p99":>9}')
+        for user, label, query in queries:
+            def run():
+                return ranked_ids(
+                    user.pk, query, settings.NOTES_SEARCH_LIMIT
+                )
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT count(*) FROM notes_search '
+                    'WHERE notes_search MATCH %s',
+                    [match_expression(user.pk, query_stems(query))],
+                )
+                matches, = cursor.fetchone()
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f'{label:<16} {matches:>10} '
+                  f'{statistics.median(timings):>7.2f}мс {p99:>7.2f}мс')
+
+
+if __name__ == '__main__':
+    main()
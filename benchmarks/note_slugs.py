@@ -0,0 +1,85 @@
+"""
+Создание заметок с часто совпадающими заголовками.
+
+Сравниваются два способа подобрать свободный slug:
+перебор «slug», «slug-2», … с запросом exists() на каждый вариант
+и allocate_slug — один запрос по диапазону значений slug.
+База — временный файл SQLite.
+
+Запуск из корня репозитория:
+    python benchmarks/note_slugs.py --notes 2000 --titles 5
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import setup_django
+
+TITLES = (
+    'Список покупок', 'План на неделю', 'Идеи для отпуска', 'Рецепт пирога',
+    'Встреча с командой', 'Книги', 'Фильмы', 'Подарки', 'Ремонт кухни',
+    'Тренировка',
+)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--titles', type=int, default=5,
+                        help='Число различных заголовков.')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        setup_django('ya_note', DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(Path(directory) / 'benchmark.sqlite3'),
+        }})
+        from django.core.management import call_command
+        from django.db import connection, transaction
+        from notes.models import Note, User
+        from pytils.translit import slugify
+        call_command('migrate', verbosity=0)
+        author = User.objects.create(username='author')
+
+        def probe_slug(note):
+            root = slugify(note.title)[:100]
+            slug, number = root, 1
+            while Note.objects.filter(slug=slug).exists():
+                number += 1
+                slug = f'{root}-{number}'
+            note.slug = slug
+
+        rng = random.Random(args.seed)
+        titles = [rng.choice(TITLES[:args.titles])
+                  for _ in range(args.notes)]
+        print(f'{"способ":<14} {"заметок/с":>10} {"запросов на заметку":>20}')
+        for name, assign in (('exists()', probe_slug),
+                             ('allocate_slug', None)):
+            Note.objects.all().delete()
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with transaction.atomic(), connection.execute_wrapper(counter):
+                for title in titles:
+                    note = Note(title=title, text='Текст', author=author)
+                    if assign:
+                        assign(note)
+                    note.save()
+            elapsed = time.perf_counter() - started
+            print(f'{name:<14} {args.notes / elapsed:>10.0f} '
+                  f'{counter.count / args.notes:>20.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Выгрузка и загрузка заметок одного пользователя.
+
+Для каждого формата выгрузка собирается во временный файл
+через те же генераторы, что отдаёт StreamingHttpResponse, затем
+заметки удаляются и загружаются обратно через NoteImporter.
+Пик памяти (tracemalloc) не должен расти с числом заметок.
+База — временный файл SQLite.
+
+Запуск из корня репозитория:
+    python benchmarks/note_transfer.py --notes 100000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from common import setup_django
+
+
+def measure(func):
+    """Время работы func и пик выделенной за это время памяти."""
+    tracemalloc.reset_peak()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    return elapsed, tracemalloc.get_traced_memory()[1] - start_memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--notes', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        setup_django('ya_note', DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': str(directory / 'benchmark.sqlite3'),
+        }})
+        from django.core.management import call_command
+        from notes.models import Note, User
+        from notes.transfer import NoteImporter, export_jsonl, export_zip
+        call_command('migrate', verbosity=0)
+        author = User.objects.create(username='author')
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {number}', text='Текст заметки. ' * 20,
+                 slug=f'note-{number}', author=author)
+            for number in range(args.notes)
+        )
+        notes = Note.objects.filter(author=author)
+        tracemalloc.start()
+        print(f'{"формат":<6} {"операция":<9} {"заметок/с":>10} '
+              f'{"пик памяти, МБ":>15}')
+        for file_format, export in (('jsonl', export_jsonl),
+                                    ('zip', export_zip)):
+            path = directory / f'notes.{file_format}'
+
+            def dump():
+                with open(path, 'wb') as file:
+                    for chunk in export(notes):
+                        file.write(chunk)
+
+            def load():
+                with open(path, 'rb') as file:
+                    result = NoteImporter(author, args.batch_size).run(
+                        file, file_format
+                    )
+                assert result.created == args.notes, result.errors
+
+            for name, func in (('экспорт', dump), ('импорт', load)):
+                elapsed, peak = measure(func)
+                print(f'{file_format:<6} {name:<9} '
+                      f'{args.notes / elapsed:>10.0f} '
+                      f'{peak / 2 ** 20:>15.1f}')
+                if func is dump:
+                    notes.delete()
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Сравнение проверки запрещённых слов в CommentForm.
+
+Старый вариант ищет каждое слово словаря подстрокой в тексте,
+новый — один проход автоматом Ахо — Корасик.
+
+Запуск из корня репозитория:
+    python benchmarks/profanity.py --words 10000 --length 20000
+"""
+import argparse
+import random
+
+from common import timeit, use_project
+
+use_project('ya_news')
+
+from news.profanity import WordMatcher  # noqa: E402
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def random_word(rng, min_length=4, max_length=9):
+    length = rng.randint(min_length, max_length)
+    return ''.join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def substring_scan(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, nargs='+',
+                        default=(10, 1000, 10000, 50000))
+    parser.add_argument('--length', type=int, nargs='+',
+                        default=(200, 5000, 50000))
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    print(f'{"слов":>8} {"символов":>9} {"построение":>11} '
+          f'{"подстроки":>10} {"автомат":>10}')
+    for words_count in args.words:
+        words = [random_word(rng) for _ in range(words_count)]
+        build_time = timeit(lambda: WordMatcher(words), repeat=1)
+        matcher = WordMatcher(words)
+        for length in args.length:
+            # Чистый текст — худший случай для обоих вариантов.
+            text = ' '.join(
+                random_word(rng, 2, 3) for _ in range(length // 3)
+            )[:length]
+            assert (substring_scan(words, text) is None) == (
+                matcher.find(text) is None
+            )
+            scan_time = timeit(lambda: substring_scan(words, text))
+            matcher_time = timeit(lambda: matcher.find(text))
+            print(f'{words_count:>8} {length:>9} {build_time:>10.3f}s '
+                  f'{scan_time * 1000:>8.2f}ms {matcher_time * 1000:>8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
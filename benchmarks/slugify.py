@@ -0,0 +1,72 @@
+"""
+Пропускная способность slugify на реалистичном потоке заголовков.
+
+Заголовки выбираются по закону Ципфа из пула: немногие шаблонные
+(«Список покупок», «План на неделю») повторяются постоянно,
+остальные встречаются редко. Сравниваются pytils.translit.slugify
+и его версия с lru_cache из notes.slugs при разных размерах кэша.
+
+Запуск из корня репозитория:
+    python benchmarks/slugify.py --titles 100000 --pool 20000
+"""
+import argparse
+import random
+from functools import lru_cache
+from itertools import accumulate
+
+from common import timeit, use_project
+
+use_project('ya_note')
+
+from pytils.translit import slugify  # noqa: E402
+
+from notes.slugs import SLUGIFY_CACHE_SIZE  # noqa: E402
+
+WORDS = (
+    'список', 'покупок', 'идеи', 'для', 'отпуска', 'рецепт', 'пирога',
+    'план', 'на', 'неделю', 'книги', 'фильмы', 'встреча', 'с', 'командой',
+    'заметки', 'лекции', 'по', 'истории', 'ремонт', 'кухни', 'подарки',
+    'день', 'рождения', 'тренировка', 'дача', 'проект', 'отчёт', 'письмо',
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=100_000,
+                        help='Длина потока заголовков.')
+    parser.add_argument('--pool', type=int, default=20_000,
+                        help='Число различных заголовков.')
+    parser.add_argument('--skew', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    pool = list({
+        ' '.join(rng.choices(WORDS, k=rng.randint(1, 6))).capitalize()
+        for _ in range(args.pool * 2)
+    })[:args.pool]
+    weights = list(accumulate(
+        1 / rank ** args.skew for rank in range(1, len(pool) + 1)
+    ))
+    titles = rng.choices(pool, cum_weights=weights, k=args.titles)
+
+    def run(func):
+        return lambda: [func(title) for title in titles]
+
+    base = timeit(run(slugify), repeat=3)
+    print(f'{"вариант":<22} {"заголовков/с":>13} {"ускорение":>10} '
+          f'{"попаданий":>10}')
+    print(f'{"pytils slugify":<22} {args.titles / base:>13.0f} '
+          f'{1:>9.1f}x {"-":>10}')
+    for size in (256, 1024, SLUGIFY_CACHE_SIZE, 16384):
+        cached = lru_cache(maxsize=size)(slugify)
+        # Каждый повтор начинается с пустого кэша.
+        best = timeit(lambda: (cached.cache_clear(), run(cached)()),
+                      repeat=3)
+        info = cached.cache_info()
+        hit_rate = info.hits / (info.hits + info.misses)
+        print(f'{f"lru_cache({size})":<22} {args.titles / best:>13.0f} '
+              f'{base / best:>9.1f}x {hit_rate:>10.1%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,18 @@
+import atexit
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .forms import bad_words_filter
+        bad_words_filter.load()
+        if settings.NEWS_VIEWS_FLUSH_AT_EXIT:
+            from .counters import flush_at_exit
+            atexit.register(flush_at_exit)
@@ -0,0 +1,61 @@
+"""
+Асинхронные обёртки страниц новостей для работы под ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому представления выполняются
+в отдельном ограниченном пуле потоков. Под ASGI синхронное
+представление заняло бы общий поток sync_to_async, и запросы
+обрабатывались бы по одному; здесь параллельно выполняется до
+ASYNC_VIEWS_WORKERS запросов, а цикл событий остаётся свободным.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from yanews.middleware import count_queries
+
+from . import views
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_VIEWS_WORKERS,
+    thread_name_prefix='news-views',
+)
+
+
+def run_in_executor(view):
+    """Превращает синхронное представление в асинхронное."""
+
+    def call(request, *args, **kwargs):
+        close_old_connections()
+        try:
+            counter = getattr(request, 'query_counter', None)
+            if counter is None:
+                return render(view(request, *args, **kwargs))
+            with count_queries(counter):
+                return render(view(request, *args, **kwargs))
+        finally:
+            close_old_connections()
+
+    call = sync_to_async(call, thread_sensitive=False, executor=executor)
+
+    async def async_view(request, *args, **kwargs):
+        return await call(request, *args, **kwargs)
+
+    return async_view
+
+
+def render(response):
+    """
+    Отрисовывает шаблон в потоке представления.
+
+    Иначе Django отрисует TemplateResponse в общем потоке
+    sync_to_async, и ленивые запросы шаблона выполнятся там.
+    """
+    if hasattr(response, 'render') and callable(response.render):
+        response = response.render()
+    return response
+
+
+news_list = run_in_executor(views.NewsList.as_view())
+news_detail = run_in_executor(views.NewsDetailView.as_view())
@@ -0,0 +1,96 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'news:version:{scope}'
+PAGE_KEY = 'news:page:{scope}:{version}:{path}'
+LIST_SCOPE = 'list'
+
+
+def detail_scope(news_pk):
+    return f'detail:{news_pk}'
+
+
+def get_version(scope):
+    """
+    Текущая версия группы закэшированных страниц.
+
+    Начальная версия берётся от времени, чтобы после вытеснения ключа
+    из кэша не совпасть с версией уже сохранённых страниц.
+    """
+    key = VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(scope):
+    """Делает недействительными все страницы группы scope."""
+    key = VERSION_KEY.format(scope=scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def bump_on_commit(*scopes):
+    """
+    Увеличивает версии групп после фиксации текущей транзакции.
+
+    Иначе анонимный запрос между увеличением версии и фиксацией
+    закэшировал бы под новой версией страницу без изменений.
+    """
+    def bump():
+        for scope in scopes:
+            bump_version(scope)
+
+    transaction.on_commit(bump)
+
+
+def page_key(scope, path):
+    return PAGE_KEY.format(
+        scope=scope,
+        version=get_version(scope),
+        path=hashlib.md5(path.encode()).hexdigest(),
+    )
+
+
+class AnonymousPageCacheMixin:
+    """
+    Кэширует готовый ответ для анонимных пользователей.
+
+    Ключ включает версию группы страниц из get_cache_scope(),
+    по умолчанию — из атрибута cache_scope; версии увеличиваются
+    сигналами при изменении новостей и комментариев. Авторизованные
+    пользователи видят форму и ссылки на редактирование, поэтому кэш
+    для них не используется.
+    """
+    cache_scope = LIST_SCOPE
+
+    def get_cache_scope(self):
+        return self.cache_scope
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        key = page_key(self.get_cache_scope(), request.get_full_path())
+        response = cache.get(key)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(response):
+                cache.set(key, response, settings.NEWS_PAGE_CACHE_TIMEOUT)
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        return response
@@ -0,0 +1,122 @@
+"""
+Счётчик просмотров новостей с отложенной записью.
+
+Просмотры копятся в памяти процесса и записываются в поле News.views
+пакетами: одним UPDATE … CASE на NEWS_VIEWS_FLUSH_BATCH_SIZE новостей.
+Запись выполняется, когда накопилось NEWS_VIEWS_FLUSH_THRESHOLD
+просмотров или с прошлой записи прошло NEWS_VIEWS_FLUSH_INTERVAL
+секунд (проверяется при очередном просмотре), а также при завершении
+процесса, если включена настройка NEWS_VIEWS_FLUSH_AT_EXIT. Если
+процесс будет убит, потеряются только ещё не записанные просмотры.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+
+from .cache import LIST_SCOPE, bump_version
+from .models import News
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Накапливает просмотры новостей и записывает их пакетами."""
+
+    def __init__(self):
+        self._counts = Counter()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def add(self, news_pk):
+        with self._lock:
+            self._counts[news_pk] += 1
+            self._pending += 1
+            due = (
+                self._pending >= settings.NEWS_VIEWS_FLUSH_THRESHOLD
+                or time.monotonic() - self._flushed_at
+                >= settings.NEWS_VIEWS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """
+        Записывает накопленные просмотры, возвращает их число.
+
+        Если запись не удалась, просмотры возвращаются в счётчик
+        до следующей попытки.
+        """
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+            self._flushed_at = time.monotonic()
+        if not counts:
+            return 0
+        try:
+            write_views(counts)
+        except DatabaseError:
+            logger.exception('Не удалось записать просмотры новостей')
+            with self._lock:
+                self._counts.update(counts)
+                self._pending += sum(counts.values())
+            return 0
+        bump_version(LIST_SCOPE)
+        return sum(counts.values())
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+            self._pending = 0
+
+
+def write_views(counts):
+    """
+    Прибавляет просмотры к News.views.
+
+    Новости с одинаковым числом новых просмотров попадают в одну
+    ветку CASE, поэтому выражение остаётся коротким.
+    """
+    pks = list(counts)
+    batch_size = settings.NEWS_VIEWS_FLUSH_BATCH_SIZE
+    with transaction.atomic():
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            groups = defaultdict(list)
+            for pk in batch:
+                groups[counts[pk]].append(pk)
+            News.objects.filter(pk__in=batch).update(views=Case(
+                *(
+                    When(pk__in=group, then=F('views') + count)
+                    for count, group in groups.items()
+                ),
+                default=F('views'),
+                output_field=PositiveIntegerField(),
+            ))
+
+
+view_counter = ViewCounter()
+
+
+def flush_at_exit():
+    """
+    Записывает оставшиеся просмотры при завершении процесса.
+
+    Подключается в NewsConfig.ready(). Если база к этому моменту
+    недоступна (например, временная база уже удалена или доступ
+    к ней запрещён), просмотры теряются с предупреждением в логе.
+    """
+    with view_counter._lock:
+        if not view_counter._pending:
+            return
+    try:
+        connection.ensure_connection()
+    except Exception:
+        logger.warning('База недоступна, незаписанные просмотры потеряны')
+        return
+    view_counter.flush()
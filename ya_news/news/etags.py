@@ -0,0 +1,46 @@
+import hashlib
+
+from django.db.models import Max
+
+from .cache import LIST_SCOPE, detail_scope, get_version
+from .models import News
+
+
+def _etag(*parts):
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def detail_state(pk):
+    """
+    Дата новости, число комментариев и время последнего изменения
+    комментария одним агрегирующим запросом.
+    """
+    return News.objects.filter(pk=pk).annotate(
+        last_comment=Max('comment__updated')
+    ).values_list('date', 'comments_count', 'last_comment')
+
+
+def detail_etag(request, pk):
+    """
+    ETag страницы новости.
+
+    Заголовок и текст в агрегаты не входят, их изменение отражает
+    версия кэша страницы, которую меняет сохранение новости.
+    """
+    state = detail_state(pk).first()
+    if state is None:
+        return None
+    return _etag(
+        'detail', pk, state, get_version(detail_scope(pk)), request.user.pk
+    )
+
+
+def list_etag(request):
+    """
+    ETag ленты новостей без запросов к базе.
+
+    Любое изменение ленты меняет версию её кэша: сохранение
+    и удаление новостей и комментариев, запись просмотров
+    в ViewCounter.flush() и пересчёт обсуждаемых новостей.
+    """
+    return _etag('list', get_version(LIST_SCOPE), request.user.pk)
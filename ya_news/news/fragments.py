@@ -0,0 +1,51 @@
+"""
+Кэш готового HTML комментариев.
+
+Общая для всех читателей часть комментария (автор, дата и текст после
+linebreaksbr) хранится в кэше под ключом из id комментария и времени
+его изменения. Страница комментариев читает фрагменты одним
+get_many() и отрисовывает шаблон только для отсутствующих в кэше,
+ссылки на редактирование и удаление зависят от читателя и выводятся
+в news/comments.html при каждом запросе.
+
+Изменённый комментарий получает новый ключ, старый фрагмент удаляется
+при редактировании и удалении комментария. Новое имя автора попадёт
+во фрагменты после NEWS_COMMENT_FRAGMENT_TIMEOUT секунд.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+FRAGMENT_KEY = 'news:comment:{pk}:{updated}'
+FRAGMENT_TEMPLATE = 'news/comment.html'
+
+
+def fragment_key(comment):
+    return FRAGMENT_KEY.format(
+        pk=comment.pk, updated=comment.updated.timestamp()
+    )
+
+
+def render_fragments(comments):
+    """Добавляет каждому комментарию готовый HTML в атрибут fragment."""
+    comments = {fragment_key(comment): comment for comment in comments}
+    if not comments:
+        return
+    fragments = cache.get_many(comments)
+    missing = {}
+    template = None
+    for key, comment in comments.items():
+        fragment = fragments.get(key)
+        if fragment is None:
+            if template is None:
+                template = get_template(FRAGMENT_TEMPLATE)
+            fragment = missing[key] = template.render({'comment': comment})
+        comment.fragment = mark_safe(fragment)
+    if missing:
+        cache.set_many(missing, settings.NEWS_COMMENT_FRAGMENT_TIMEOUT)
+
+
+def forget_fragment(comment):
+    """Удаляет фрагмент комментария до его изменения или удаления."""
+    cache.delete(fragment_key(comment))
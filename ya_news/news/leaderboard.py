@@ -0,0 +1,125 @@
+"""
+Самые обсуждаемые новости за последние NEWS_DISCUSSED_WINDOW_DAYS дней.
+
+Таблица DiscussedNews хранит готовое число комментариев к каждой
+новости за период, поэтому блок читается одним запросом по индексу,
+без группировки комментариев. Готовый блок хранится в кэше под
+версией ленты новостей, которая меняется при каждом изменении
+комментариев, так что на главной странице он обычно берётся из кэша.
+
+Счётчик увеличивается при добавлении комментария и уменьшается при
+удалении комментария, оставленного в пределах периода. Комментарии,
+ставшие старше периода, выбывают при пересчёте командой
+reconcile_leaderboard, которую нужно запускать периодически:
+до пересчёта в блоке учитываются и они.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .cache import LIST_SCOPE, get_version
+from .models import Comment, DiscussedNews
+
+TOP_KEY = 'news:discussed:{version}:{limit}'
+# Сколько строк удаляется одним запросом при пересчёте.
+RECONCILE_BATCH_SIZE = 500
+
+
+def window_start():
+    return timezone.now() - timedelta(
+        days=settings.NEWS_DISCUSSED_WINDOW_DAYS
+    )
+
+
+def record_comment(news_id):
+    """
+    Учитывает новый комментарий к новости.
+
+    Строка таблицы создаётся или увеличивается одним запросом
+    INSERT … ON CONFLICT, поэтому одновременные комментарии
+    к одной новости не теряются.
+    """
+    table = connection.ops.quote_name(DiscussedNews._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (news_id, comments) VALUES (%s, 1) '
+            'ON CONFLICT (news_id) '
+            f'DO UPDATE SET comments = {table}.comments + 1',
+            [news_id],
+        )
+
+
+def forget_comment(comment):
+    """Учитывает удаление комментария, если он входил в период."""
+    if comment.created < window_start():
+        return
+    DiscussedNews.objects.filter(news_id=comment.news_id).update(
+        comments=Greatest(F('comments') - 1, 0)
+    )
+
+
+def top(limit):
+    """Самые обсуждаемые новости с числом комментариев за период."""
+    return DiscussedNews.objects.filter(
+        comments__gt=0
+    ).select_related('news').order_by('-comments', '-news_id')[:limit]
+
+
+def cached_top(limit):
+    """top() из кэша, действительный до изменения версии ленты."""
+    key = TOP_KEY.format(version=get_version(LIST_SCOPE), limit=limit)
+    items = cache.get(key)
+    if items is None:
+        items = list(top(limit))
+        cache.set(key, items, settings.NEWS_PAGE_CACHE_TIMEOUT)
+    return items
+
+
+def window_comments():
+    """
+    Id новостей всех комментариев за период.
+
+    Запрос читает только покрывающий индекс (created, news) в пределах
+    периода. С группировкой в SQL планировщик SQLite предпочёл бы
+    полный просмотр индекса по новостям.
+    """
+    return Comment.objects.filter(
+        created__gte=window_start()
+    ).order_by().values_list('news_id', flat=True)
+
+
+@transaction.atomic
+def reconcile():
+    """
+    Пересчитывает таблицу по комментариям за период.
+
+    Строки записываются тем же INSERT … ON CONFLICT, что и в
+    record_comment(), а строки новостей без комментариев за период
+    удаляются. Удаление всей таблицы с последующей вставкой
+    на PostgreSQL конфликтовало бы со строкой, которую одновременно
+    вставил record_comment(), и пересчёт откатился бы целиком.
+    """
+    counts = Counter(window_comments().iterator())
+    table = connection.ops.quote_name(DiscussedNews._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (news_id, comments) VALUES (%s, %s) '
+            'ON CONFLICT (news_id) DO UPDATE SET comments = excluded.comments',
+            list(counts.items()),
+        )
+    stale = [
+        news_id
+        for news_id in DiscussedNews.objects.values_list('news_id', flat=True)
+        if news_id not in counts
+    ]
+    for start in range(0, len(stale), RECONCILE_BATCH_SIZE):
+        DiscussedNews.objects.filter(
+            news_id__in=stale[start:start + RECONCILE_BATCH_SIZE]
+        ).delete()
+    return len(counts)
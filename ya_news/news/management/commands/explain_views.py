@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from news.etags import detail_state
+from news.leaderboard import top, window_comments
+from news.models import Comment, News
+from news.views import CommentBase, NewsList, get_comments_paginator
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит планы выполнения (EXPLAIN) запросов, которые выполняют '
+        'представления ya_news, на данных текущей базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compare', action='store_true',
+            help=(
+                'Дополнительно показать планы без составных индексов. '
+                'Индексы удаляются в транзакции, которая затем '
+                'откатывается (SQLite и PostgreSQL).'
+            )
+        )
+
+    def handle(self, *args, **options):
+        news = News.objects.order_by('-date', '-id').first()
+        comment = Comment.objects.order_by('-news_id').first()
+        if news is None or comment is None:
+            raise CommandError(
+                'Нужна хотя бы одна новость с комментарием, '
+                'заполните базу командой seed_load.'
+            )
+        querysets = self.querysets(news, comment)
+        if options['compare']:
+            # SQLite кэширует подготовленные запросы соединения,
+            # поэтому каждый набор планов строится в новом соединении.
+            connection.close()
+            with transaction.atomic():
+                self.drop_indexes()
+                self.explain('Без составных индексов', querysets)
+                transaction.set_rollback(True)
+            connection.close()
+        self.explain('С индексами', querysets)
+
+    def querysets(self, news, comment):
+        """Запросы представлений в том виде, в котором их строят views."""
+        news_list = self.list_paginator({})
+        popular = self.list_paginator({'order': 'popular'})
+        comments = get_comments_paginator(comment.news_id)
+        comment_view = CommentBase()
+        comment_view.request = SimpleNamespace(user=comment.author)
+        return (
+            ('news:home, первая страница', news_list.page_queryset()),
+            (
+                'news:home, следующая страница',
+                news_list.page_queryset([news.date, news.pk]),
+            ),
+            ('news:home?order=popular', popular.page_queryset()),
+            (
+                'news:home?order=popular, следующая страница',
+                popular.page_queryset([news.views, news.pk]),
+            ),
+            ('news:home, обсуждаемые новости', top(5)),
+            ('reconcile_leaderboard', window_comments()),
+            ('news:detail, ETag', detail_state(news.pk)),
+            ('news:detail, новость', News.objects.filter(pk=news.pk)),
+            ('news:detail, комментарии', comments.page_queryset()),
+            (
+                'news:comments, следующая страница',
+                comments.page_queryset([comment.created, comment.pk]),
+            ),
+            (
+                'news:edit / news:delete',
+                comment_view.get_queryset().filter(pk=comment.pk),
+            ),
+        )
+
+    def list_paginator(self, params):
+        view = NewsList()
+        view.request = SimpleNamespace(GET=params)
+        return view.get_paginator(News.objects.all(), 10)
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (News, Comment):
+                for index in model._meta.indexes:
+                    cursor.execute(
+                        f'DROP INDEX {connection.ops.quote_name(index.name)}'
+                    )
+
+    def explain(self, title, querysets):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {title} =='))
+        for name, queryset in querysets:
+            self.stdout.write(self.style.MIGRATE_LABEL(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
@@ -0,0 +1,162 @@
+import csv
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from news.cache import (
+    LIST_SCOPE, bump_on_commit, bump_version, detail_scope,
+)
+from news.models import News
+
+FORMATS = ('jsonl', 'csv')
+FIELDS = ('title', 'text', 'date')
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково загружает новости из файла JSONL или CSV '
+        '(или из stdin, если указан «-») пакетами через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Путь к файлу или «-» для чтения из stdin.'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат данных, по умолчанию определяется по расширению.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество новостей в одной транзакции.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Обновлять новости с тем же source_id вместо создания.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        file_format = options['format'] or self.guess_format(options['path'])
+        self.upsert = options['upsert']
+        self.verbosity = options['verbosity']
+        self.errors = 0
+        self.created = self.updated = 0
+        started = time.perf_counter()
+        with self.open(options['path']) as file:
+            rows = self.read(file, file_format)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self.write_batch(batch)
+                self.report(started)
+        bump_version(LIST_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: {self.created}, обновлено: {self.updated}, '
+            f'ошибок: {self.errors}.'
+        ))
+
+    def guess_format(self, path):
+        suffix = path.rsplit('.', 1)[-1].lower()
+        if suffix not in FORMATS:
+            raise CommandError('Укажите формат данных через --format.')
+        return suffix
+
+    def open(self, path):
+        if path == '-':
+            return open(
+                sys.stdin.fileno(), encoding='utf-8', newline='', closefd=False
+            )
+        try:
+            return open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(error)
+
+    def read(self, file, file_format):
+        """Лениво отдаёт несохранённые объекты News по одному."""
+        if file_format == 'csv':
+            records = csv.DictReader(file)
+        else:
+            records = (line for line in file if line.strip())
+        for number, record in enumerate(records, start=1):
+            try:
+                if file_format == 'jsonl':
+                    record = json.loads(record)
+                yield self.build(record)
+            except (ValidationError, ValueError, TypeError, KeyError) as error:
+                self.error(f'Строка {number}: {error}')
+
+    def build(self, record):
+        news = News(
+            title=record['title'],
+            text=record['text'],
+            source_id=record.get('source_id') or None,
+        )
+        if record.get('date'):
+            news.date = date.fromisoformat(record['date'])
+        # При --upsert обновляются только поля, заданные в записи:
+        # без даты новость не должна получить сегодняшнюю.
+        news.imported_fields = tuple(
+            field for field in FIELDS if record.get(field)
+        )
+        news.full_clean(exclude=('source_id',), validate_unique=False)
+        if self.upsert and news.source_id is None:
+            raise ValueError('для --upsert нужен source_id')
+        return news
+
+    def write_batch(self, batch):
+        try:
+            with transaction.atomic():
+                if self.upsert:
+                    self.upsert_batch(batch)
+                else:
+                    News.objects.bulk_create(batch)
+                    self.created += len(batch)
+        except IntegrityError as error:
+            raise CommandError(
+                f'{error}. Для повторной загрузки используйте --upsert.'
+            )
+
+    def upsert_batch(self, batch):
+        """Обновляет существующие по source_id новости, остальные создаёт."""
+        by_source = {news.source_id: news for news in batch}
+        existing = News.objects.in_bulk(
+            list(by_source), field_name='source_id'
+        )
+        to_update = defaultdict(list)
+        for source_id, news in existing.items():
+            incoming = by_source.pop(source_id)
+            for field in incoming.imported_fields:
+                setattr(news, field, getattr(incoming, field))
+            to_update[incoming.imported_fields].append(news)
+        for fields, news_list in to_update.items():
+            News.objects.bulk_update(news_list, fields)
+        News.objects.bulk_create(by_source.values())
+        bump_on_commit(*(detail_scope(news.pk) for news in existing.values()))
+        self.updated += len(existing)
+        self.created += len(by_source)
+
+    def error(self, message):
+        self.errors += 1
+        if self.errors <= MAX_REPORTED_ERRORS:
+            self.stderr.write(message)
+
+    def report(self, started):
+        if self.verbosity < 1:
+            return
+        done = self.created + self.updated
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Обработано {done} новостей, '
+            f'{done / elapsed if elapsed else 0:.0f} в секунду'
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from news.cache import LIST_SCOPE, bump_version
+from news.leaderboard import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает самые обсуждаемые новости за период '
+        'NEWS_DISCUSSED_WINDOW_DAYS. Запускается периодически, '
+        'чтобы старые комментарии выбывали из рейтинга.'
+    )
+
+    def handle(self, *args, **options):
+        count = reconcile()
+        bump_version(LIST_SCOPE)
+        self.stdout.write(
+            self.style.SUCCESS(f'Новостей в рейтинге: {count}')
+        )
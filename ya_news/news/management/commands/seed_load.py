@@ -0,0 +1,163 @@
+import multiprocessing
+import random
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from news.cache import LIST_SCOPE, bump_version
+from news.models import Comment, News
+
+User = get_user_model()
+
+WORDS = (
+    'новость', 'город', 'погода', 'выборы', 'футбол', 'рынок', 'наука',
+    'космос', 'школа', 'театр', 'зима', 'лето', 'дорога', 'мост', 'завод',
+    'врач', 'учёный', 'министр', 'фестиваль', 'рекорд', 'открытие',
+    'ремонт', 'снегопад', 'концерт', 'выставка', 'пожар', 'суд', 'биржа',
+    'урожай', 'спутник', 'метро', 'парк', 'музей', 'турнир', 'закон',
+)
+# Идентификаторы, общие для рабочих процессов (наследуются при fork).
+shared = {}
+
+
+def sentence(rng, min_words, max_words):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize()
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для random.choices."""
+    return list(accumulate(1 / (rank ** exponent)
+                           for rank in range(1, size + 1)))
+
+
+def create_users(start, count, seed, batch_size):
+    password = shared['password']
+    for offset in range(start, start + count, batch_size):
+        User.objects.bulk_create(
+            User(username=f'{shared["prefix"]}{index}', password=password)
+            for index in range(offset, min(offset + batch_size, start + count))
+        )
+
+
+def create_news(start, count, seed, batch_size):
+    rng = random.Random(seed)
+    today = date.today()
+    for offset in range(start, start + count, batch_size):
+        size = min(batch_size, start + count - offset)
+        News.objects.bulk_create(
+            News(
+                title=sentence(rng, 2, 5)[:50],
+                text=sentence(rng, 20, 80),
+                date=today - timedelta(days=rng.randrange(365 * 3)),
+                # Популярность новостей распределена с тяжёлым хвостом.
+                views=int(rng.paretovariate(1.2) * 10),
+            )
+            for _ in range(size)
+        )
+
+
+def create_comments(start, count, seed, batch_size):
+    rng = random.Random(seed)
+    news_ids, news_weights = shared['news_ids'], shared['news_weights']
+    user_ids, user_weights = shared['user_ids'], shared['user_weights']
+    for offset in range(start, start + count, batch_size):
+        size = min(batch_size, start + count - offset)
+        news = rng.choices(news_ids, cum_weights=news_weights, k=size)
+        authors = rng.choices(user_ids, cum_weights=user_weights, k=size)
+        Comment.objects.bulk_create(
+            Comment(news_id=news_id, author_id=author_id,
+                    text=sentence(rng, 3, 30))
+            for news_id, author_id in zip(news, authors)
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу ya_news синтетическими пользователями, новостями '
+        'и комментариями для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--news', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=(
+                'Число процессов для записи. Имеет смысл для СУБД '
+                'с параллельной записью (PostgreSQL), SQLite '
+                'сериализует запись.'
+            )
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа комментариев по новостям.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['news'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь и новость.')
+        self.options = options
+        rng = random.Random(options['seed'])
+        shared['prefix'] = f'load-{time.time_ns():x}-'
+        shared['password'] = make_password('load-test')
+        last_news = News.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+
+        self.run('Пользователи', create_users, options['users'])
+        self.run('Новости', create_news, options['news'])
+
+        shared['user_ids'] = list(User.objects.filter(
+            username__startswith=shared['prefix']
+        ).values_list('pk', flat=True))
+        shared['news_ids'] = list(News.objects.filter(
+            pk__gt=last_news
+        ).values_list('pk', flat=True))
+        rng.shuffle(shared['news_ids'])
+        shared['news_weights'] = zipf_cum_weights(
+            len(shared['news_ids']), options['skew']
+        )
+        shared['user_weights'] = zipf_cum_weights(
+            len(shared['user_ids']), 1.0
+        )
+        self.run('Комментарии', create_comments, options['comments'])
+        call_command('recount_comments', stdout=self.stdout)
+        call_command('reconcile_leaderboard', stdout=self.stdout)
+        bump_version(LIST_SCOPE)
+        shared.clear()
+
+    def run(self, title, func, total):
+        """Делит total строк между процессами и выполняет func."""
+        if total < 1:
+            return
+        started = time.perf_counter()
+        workers = max(1, min(self.options['workers'], total))
+        chunk = -(-total // workers)
+        tasks = [
+            (start, min(chunk, total - start), self.options['seed'] + start,
+             self.options['batch_size'])
+            for start in range(0, total, chunk)
+        ]
+        if workers == 1:
+            for task in tasks:
+                func(*task)
+        else:
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                pool.starmap(func, tasks)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{title}: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} в секунду)'
+        )
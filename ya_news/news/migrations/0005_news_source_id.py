@@ -0,0 +1,18 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='source_id',
+            field=models.CharField(editable=False, max_length=255, null=True, unique=True, verbose_name='Идентификатор в источнике'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Текст хранится с «е» вместо «ё»: токенизатор unicode61
+# приводит регистр, но не отождествляет эти буквы.
+NORMALIZED = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+TRIGGERS_SQL = (
+    "CREATE TRIGGER news_search_insert AFTER INSERT ON news_news BEGIN "
+    "INSERT INTO news_search (rowid, title, text) VALUES "
+    f"(new.id, {NORMALIZED.format('new.title')}, "
+    f"{NORMALIZED.format('new.text')}); END",
+    "CREATE TRIGGER news_search_update AFTER UPDATE OF title, text "
+    "ON news_news BEGIN "
+    f"UPDATE news_search SET title = {NORMALIZED.format('new.title')}, "
+    f"text = {NORMALIZED.format('new.text')} WHERE rowid = new.id; END",
+    "CREATE TRIGGER news_search_delete AFTER DELETE ON news_news BEGIN "
+    "DELETE FROM news_search WHERE rowid = old.id; END",
+)
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE news_search USING fts5("
+    "title, text, tokenize = 'unicode61 remove_diacritics 2')",
+    *TRIGGERS_SQL,
+    "INSERT INTO news_search (rowid, title, text) "
+    f"SELECT id, {NORMALIZED.format('title')}, {NORMALIZED.format('text')} "
+    "FROM news_news",
+)
+
+DROP_TRIGGERS_SQL = (
+    'DROP TRIGGER IF EXISTS news_search_insert',
+    'DROP TRIGGER IF EXISTS news_search_update',
+    'DROP TRIGGER IF EXISTS news_search_delete',
+)
+
+DROP_SQL = (
+    *DROP_TRIGGERS_SQL,
+    'DROP TABLE IF EXISTS news_search',
+)
+
+
+def run_sqlite(statements):
+    """Полнотекстовый индекс FTS5 есть только в SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:26
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite добавляет поле, пересоздавая таблицу news_news, и триггеры
+# полнотекстового индекса удаляются вместе со старой таблицей.
+news_search = import_module('news.migrations.0007_news_search')
+RESTORE_TRIGGERS_SQL = (
+    *news_search.DROP_TRIGGERS_SQL,
+    *news_search.TRIGGERS_SQL,
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_news_search'),
+    ]
+
+    operations = [
+        # При откате поле удаляется так же, через пересоздание таблицы.
+        migrations.RunPython(
+            migrations.RunPython.noop,
+            news_search.run_sqlite(RESTORE_TRIGGERS_SQL),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество просмотров'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['views', 'id'], name='news_views_id_idx'),
+        ),
+        migrations.RunPython(
+            news_search.run_sqlite(RESTORE_TRIGGERS_SQL),
+            migrations.RunPython.noop,
+        ),
+    ]
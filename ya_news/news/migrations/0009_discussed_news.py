@@ -0,0 +1,33 @@
+# Generated by Django 3.2.15 on 2026-10-18 20:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_news_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DiscussedNews',
+            fields=[
+                ('news', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='discussion', serialize=False, to='news.news')),
+                ('comments', models.PositiveIntegerField(default=0, verbose_name='Комментариев за период')),
+            ],
+            options={
+                'verbose_name': 'Обсуждаемая новость',
+                'verbose_name_plural': 'Обсуждаемые новости',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created', 'news'], name='comment_created_news_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='discussednews',
+            index=models.Index(fields=['comments', 'news'], name='discussed_comments_idx'),
+        ),
+    ]
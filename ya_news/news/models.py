@@ -8,9 +8,30 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    source_id = models.CharField(
+        'Идентификатор в источнике',
+        max_length=255,
+        unique=True,
+        null=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    views = models.PositiveIntegerField(
+        'Количество просмотров',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-id')
+        indexes = (
+            models.Index(fields=('date', 'id'), name='news_date_id_idx'),
+            models.Index(fields=('views', 'id'), name='news_views_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -29,9 +50,53 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('news', 'updated'), name='comment_news_updated_idx'
+            ),
+            models.Index(
+                fields=('created', 'news'), name='comment_created_news_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+
+class DiscussedNews(models.Model):
+    """
+    Число комментариев к новости за последние
+    NEWS_DISCUSSED_WINDOW_DAYS дней.
+
+    Обновляется при добавлении и удалении комментариев,
+    командой reconcile_leaderboard пересчитывается заново.
+    """
+    news = models.OneToOneField(
+        News,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='discussion',
+    )
+    comments = models.PositiveIntegerField(
+        'Комментариев за период',
+        default=0,
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('comments', 'news'), name='discussed_comments_idx'
+            ),
+        )
+        verbose_name_plural = 'Обсуждаемые новости'
+        verbose_name = 'Обсуждаемая новость'
+
+    def __str__(self):
+        return f'{self.news}: {self.comments}'
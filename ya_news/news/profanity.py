@@ -0,0 +1,121 @@
+import os
+import threading
+from collections import deque
+
+
+def normalize(text):
+    """Приводит текст к единому виду: без регистра и с «е» вместо «ё»."""
+    return text.casefold().replace('ё', 'е')
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик для поиска любого из слов в тексте.
+
+    Строится один раз по словарю, после чего проверка текста занимает
+    время, пропорциональное длине текста, независимо от размера словаря.
+    """
+
+    def __init__(self, words):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [None]
+        for word in words:
+            word = normalize(word.strip())
+            if word:
+                self._add(word)
+        self._link()
+
+    def _add(self, word):
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        self._output[state] = word
+
+    def _link(self):
+        """Строит суффиксные ссылки обходом бора в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[
+                        self._fail[next_state]
+                    ]
+
+    def find(self, text):
+        """Возвращает первое найденное в тексте слово или None."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in normalize(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state] is not None:
+                return output[state]
+        return None
+
+
+class BadWordsFilter:
+    """
+    Словарь запрещённых слов, собранный в WordMatcher.
+
+    К встроенным словам добавляются слова из файла (по одному в строке,
+    строки с «#» пропускаются). Автомат перестраивается,
+    когда меняется время изменения файла.
+    """
+
+    def __init__(self, words, path=None):
+        self.words = tuple(words)
+        self.path = path
+        self._lock = threading.Lock()
+        self._matcher = None
+        self._mtime = None
+
+    def _file_mtime(self):
+        if not self.path:
+            return None
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_file(self):
+        if self._mtime is None:
+            return []
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return [
+                    line for line in file
+                    if line.strip() and not line.lstrip().startswith('#')
+                ]
+        except FileNotFoundError:
+            return []
+
+    def load(self):
+        """Перестраивает автомат, если словарь ещё не загружен или изменён."""
+        mtime = self._file_mtime()
+        if self._matcher is not None and mtime == self._mtime:
+            return self._matcher
+        with self._lock:
+            if self._matcher is None or mtime != self._mtime:
+                self._mtime = mtime
+                self._matcher = WordMatcher(
+                    self.words + tuple(self._read_file())
+                )
+        return self._matcher
+
+    def find(self, text):
+        return self.load().find(text)
@@ -2,14 +2,64 @@ from datetime import datetime, timedelta
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 
+from news.counters import view_counter
 from news.models import Comment, News
+from yanews.auth import user_cache
+from yanews.middleware import view_queries
 
 COMMENTS_COUNT = 3
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Закэшированные страницы и пользователи не должны переходить
+    из теста в тест.
+    """
+    cache.clear()
+    user_cache.clear()
+    yield
+    cache.clear()
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def cached_sessions(settings):
+    """
+    Счётчики запросов в тестах рассчитаны на сессии в кэше.
+    Тесты идут в одном процессе, поэтому LocMemCache для этого годится.
+    """
+    settings.SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+@pytest.fixture(autouse=True)
+def clear_view_counter():
+    """Незаписанные просмотры не должны переходить из теста в тест."""
+    view_counter.clear()
+    yield
+    view_counter.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_budget():
+    """Проваливает тест, если представление превысило бюджет запросов
+    из настройки QUERY_BUDGETS.
+    """
+    def check_budget(view_name, count, **kwargs):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        assert budget is None or count <= budget, (
+            f'{view_name}: {count} SQL-запросов при бюджете {budget}'
+        )
+
+    view_queries.connect(check_budget)
+    yield
+    view_queries.disconnect(check_budget)
+
+
 @pytest.fixture
 def author(django_user_model):
     return django_user_model.objects.create(username='Автор')
@@ -0,0 +1,123 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from news.models import Comment, DiscussedNews, News
+from news.search import search
+
+
+@pytest.fixture
+def feed(tmp_path):
+    path = tmp_path / 'feed.jsonl'
+    path.write_text('\n'.join(
+        json.dumps({
+            'source_id': f'wire-{index}',
+            'title': f'Новость {index}',
+            'text': 'Текст',
+            'date': '2024-01-0' + str(index + 1),
+        }, ensure_ascii=False)
+        for index in range(3)
+    ) + '\n{"title": ""}\n', encoding='utf-8')
+    return path
+
+
+@pytest.mark.django_db
+def test_import_news_upsert(feed):
+    """Повторная загрузка с --upsert обновляет новости без дублей,
+    некорректные строки пропускаются.
+    """
+    stderr = StringIO()
+    call_command(
+        'import_news', str(feed), batch_size=2,
+        stdout=StringIO(), stderr=stderr
+    )
+    assert News.objects.count() == 3
+    assert 'Строка 4' in stderr.getvalue()
+    feed.write_text(json.dumps({
+        'source_id': 'wire-1', 'title': 'Уточнение', 'text': 'Текст'
+    }), encoding='utf-8')
+    old_date = News.objects.get(source_id='wire-1').date
+    call_command('import_news', str(feed), upsert=True, stdout=StringIO())
+    assert News.objects.count() == 3
+    news = News.objects.get(source_id='wire-1')
+    assert news.title == 'Уточнение'
+    assert news.date == old_date
+
+
+@pytest.mark.django_db
+def test_import_news_csv(tmp_path):
+    """Новости загружаются из CSV-файла."""
+    path = tmp_path / 'feed.csv'
+    path.write_text(
+        'title,text,date\nЗаголовок,"Текст, с запятой",2024-02-01\n',
+        encoding='utf-8'
+    )
+    call_command('import_news', str(path), stdout=StringIO())
+    news = News.objects.get()
+    assert news.text == 'Текст, с запятой'
+    assert news.date.isoformat() == '2024-02-01'
+
+
+@pytest.mark.django_db
+def test_explain_views(comment):
+    """Команда explain_views выводит планы запросов с индексами и без."""
+    stdout = StringIO()
+    call_command('explain_views', compare=True, stdout=stdout)
+    output = stdout.getvalue()
+    assert 'Без составных индексов' in output
+    assert 'comment_news_created_idx' in output
+    assert 'news_views_id_idx' in output
+    assert 'comment_created_news_idx' in output
+    assert 'discussed_comments_idx' in output
+
+
+@pytest.mark.django_db
+def test_reconcile_leaderboard(news, comments):
+    """Команда reconcile_leaderboard пересчитывает рейтинг обсуждаемых
+    новостей, комментарии старше периода выбывают.
+    """
+    recent_count = Comment.objects.count() - 1
+    stale = Comment.objects.filter(news=news).first()
+    Comment.objects.filter(pk=stale.pk).update(
+        created=timezone.now() - timedelta(
+            days=settings.NEWS_DISCUSSED_WINDOW_DAYS + 1
+        )
+    )
+    other = News.objects.create(title='Другая', text='Текст')
+    DiscussedNews.objects.create(news=news, comments=50)
+    DiscussedNews.objects.create(news=other, comments=100)
+    call_command('reconcile_leaderboard', stdout=StringIO())
+    assert list(DiscussedNews.objects.values_list('news', 'comments')) == [
+        (news.pk, recent_count)
+    ]
+
+
+@pytest.mark.django_db
+def test_seed_load(django_user_model):
+    """Команда seed_load создаёт данные и пересчитывает счётчики."""
+    call_command(
+        'seed_load', users=3, news=5, comments=40, batch_size=7,
+        stdout=StringIO()
+    )
+    assert django_user_model.objects.count() == 3
+    assert News.objects.count() == 5
+    assert Comment.objects.count() == 40
+    assert sum(
+        News.objects.values_list('comments_count', flat=True)
+    ) == 40
+
+
+@pytest.mark.django_db
+def test_rebuild_search_index(news):
+    """Команда восстанавливает потерянный полнотекстовый индекс."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM news_search')
+    assert search(news.title, 10).object_list == []
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert search(news.title, 10).object_list == [news]
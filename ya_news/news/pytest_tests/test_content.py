@@ -1,8 +1,22 @@
+from http import HTTPStatus
+from unittest import mock
+
 import pytest
+from asgiref.sync import async_to_sync
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, Client, RequestFactory
 from django.urls import reverse
 
+from news.async_views import news_list
+from news.cache import detail_scope, get_version
+from news.counters import view_counter
 from news.forms import CommentForm
+from news.fragments import fragment_key
+from news.models import Comment, DiscussedNews, News
+from yanews.middleware import QueryCounter, view_queries
 
 URL_HOME = reverse('news:home')
 
@@ -16,6 +30,89 @@ def test_news_count(client, all_news):
     assert news_count == settings.NEWS_COUNT_ON_HOME_PAGE
 
 
+@pytest.mark.django_db
+def test_popular_order(client, all_news):
+    """Самые читаемые новости идут по убыванию числа просмотров."""
+    for views, news in enumerate(News.objects.all()):
+        News.objects.filter(pk=news.pk).update(views=views % 4)
+    response = client.get(URL_HOME, {'order': 'popular'})
+    keys = [(news.views, news.pk) for news in response.context['object_list']]
+    assert keys == sorted(keys, reverse=True)
+    assert len(keys) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert response.context['order'] == 'popular'
+
+
+@pytest.mark.django_db
+def test_discussed_news_block(
+        admin_client, all_news, django_assert_num_queries
+):
+    """Блок обсуждаемых новостей идёт по убыванию числа комментариев
+    и при повторном запросе берётся из кэша.
+    """
+    news = list(News.objects.all()[:3])
+    DiscussedNews.objects.bulk_create(
+        DiscussedNews(news=item, comments=count)
+        for count, item in enumerate(news)
+    )
+    response = admin_client.get(URL_HOME)
+    assert [item.news for item in response.context['discussed']] == [
+        news[2], news[1]
+    ]
+    # Читается только страница новостей, ETag не обращается к базе,
+    # пользователь и блок берутся из кэша.
+    with django_assert_num_queries(1) as captured:
+        admin_client.get(URL_HOME)
+    for query in captured.captured_queries:
+        assert 'news_discussednews' not in query['sql']
+
+
+@pytest.mark.django_db
+def test_home_page_does_not_load_comments(
+        client, all_news, comments, django_assert_num_queries
+):
+    """Главная страница строится одним запросом без чтения комментариев,
+    ещё один читает блок обсуждаемых новостей, пока его нет в кэше.
+    ETag вычисляется без запросов.
+    """
+    with django_assert_num_queries(2) as captured:
+        client.get(URL_HOME)
+    for query in captured.captured_queries:
+        assert 'news_comment' not in query['sql']
+
+
+@pytest.mark.django_db
+def test_news_pages_cover_all_news(client):
+    """Курсорная пагинация проходит все новости с одной датой
+    без пропусков и повторов в обе стороны.
+    """
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Просто текст.')
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE * 2 + 1)
+    )
+    pages = []
+    page = client.get(URL_HOME).context['page_obj']
+    pages.append([news.pk for news in page.object_list])
+    while page.has_next():
+        page = client.get(
+            URL_HOME, {'after': page.next_cursor}
+        ).context['page_obj']
+        pages.append([news.pk for news in page.object_list])
+    seen = [pk for pk_list in pages for pk in pk_list]
+    assert sorted(seen, reverse=True) == seen
+    assert set(seen) == set(News.objects.values_list('pk', flat=True))
+    page = client.get(
+        URL_HOME, {'before': page.previous_cursor}
+    ).context['page_obj']
+    assert [news.pk for news in page.object_list] == pages[-2]
+
+
+@pytest.mark.django_db
+def test_bad_cursor_returns_not_found(client):
+    """Подделанный курсор страницы приводит к ошибке 404."""
+    response = client.get(URL_HOME, {'after': 'bad-cursor'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.django_db
 def test_news_order(client, all_news):
     """Новости отсортированы от самой свежей к самой старой."""
@@ -41,6 +138,32 @@ def test_comments_order(client, news, comments, detail_url):
     assert all_comments == sorted_comments
 
 
+@pytest.mark.django_db
+def test_comments_are_paged(client, settings, author, news, detail_url):
+    """На странице новости выводится только первая страница комментариев,
+    остальные подгружаются по ссылке «Показать ещё».
+    """
+    settings.COMMENTS_COUNT_ON_PAGE = 2
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(settings.COMMENTS_COUNT_ON_PAGE + 1)
+    )
+    page = client.get(detail_url).context['comments_page']
+    first_page = [comment.pk for comment in page.object_list]
+    assert len(first_page) == settings.COMMENTS_COUNT_ON_PAGE
+    response = client.get(
+        reverse('news:comments', args=(news.pk,)),
+        {'after': page.next_cursor}
+    )
+    next_page = [
+        comment.pk for comment in response.context['comments_page']
+        .object_list
+    ]
+    assert first_page + next_page == list(
+        news.comment_set.values_list('pk', flat=True)
+    )
+
+
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(client, news, detail_url):
     """Анонимному пользователю недоступна форма для
@@ -57,3 +180,246 @@ def test_authorized_client_has_form(admin_client, news, detail_url):
     response = admin_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+@pytest.mark.django_db
+def test_query_count_headers_in_debug(client, settings):
+    """В режиме отладки число SQL-запросов отдаётся в заголовках."""
+    settings.DEBUG = True
+    response = client.get(URL_HOME)
+    assert response['X-Query-Count'] == '2'
+    assert 'X-Query-Time' in response
+
+
+@pytest.mark.django_db
+def test_queries_are_counted_under_asgi(news):
+    """Под ASGI считаются запросы синхронных промежуточных слоёв
+    и представлений, выполняемых в потоках sync_to_async.
+    """
+    counts = []
+
+    def collect(view_name, count, **kwargs):
+        counts.append((view_name, count))
+
+    async def get_home():
+        return await AsyncClient().get(URL_HOME)
+
+    view_queries.connect(collect)
+    try:
+        async_to_sync(get_home)()
+    finally:
+        view_queries.disconnect(collect)
+    assert counts == [('news:home', 2)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+    )
+)
+def test_anonymous_pages_are_cached(
+        client, news, detail_url, django_assert_num_queries,
+        settings, tmp_path, backend
+):
+    """Повторный запрос анонимного читателя отдаётся из кэша,
+    выполняется только запрос для ETag страницы новости.
+    """
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+    }
+    client.get(URL_HOME)
+    client.get(detail_url)
+    with django_assert_num_queries(1):
+        assert client.get(URL_HOME).status_code == HTTPStatus.OK
+        assert client.get(detail_url).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_new_comment_invalidates_cache(
+        auth_client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """Новый комментарий виден анонимному читателю сразу после
+    фиксации транзакции.
+    """
+    anonymous = Client()
+    anonymous.get(URL_HOME)
+    anonymous.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(detail_url, data={'text': 'Свежий комментарий'})
+    assert 'Свежий комментарий' in anonymous.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in anonymous.get(URL_HOME).content.decode()
+
+
+def test_cache_version_waits_for_commit(
+        auth_client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """Версия кэша меняется только после фиксации транзакции."""
+    version = get_version(detail_scope(news.pk))
+    with django_capture_on_commit_callbacks() as callbacks:
+        auth_client.post(detail_url, data={'text': 'Комментарий'})
+        assert get_version(detail_scope(news.pk)) == version
+    for callback in callbacks:
+        callback()
+    assert get_version(detail_scope(news.pk)) != version
+
+
+@pytest.mark.django_db
+def test_not_modified_pages(client, news, detail_url):
+    """Неизменившиеся страницы отдаются с кодом 304 без тела."""
+    for url in (URL_HOME, detail_url):
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response.content == b''
+
+
+@pytest.mark.django_db
+def test_etag_follows_news_changes(
+        client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """После правки новости старый ETag не даёт ответа 304."""
+    etag = client.get(detail_url)['ETag']
+    news.text = 'Исправленный текст'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Исправленный текст' in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_list_etag_follows_views_flush(client, news):
+    """ETag ленты меняется после записи накопленных просмотров."""
+    etag = client.get(URL_HOME)['ETag']
+    view_counter.add(news.pk)
+    view_counter.flush()
+    response = client.get(URL_HOME, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_follows_comment_changes(
+        auth_client, news, detail_url, django_capture_on_commit_callbacks
+):
+    """ETag страницы новости меняется после создания, редактирования
+    и удаления комментария.
+    """
+    anonymous = Client()
+    etags = [anonymous.get(detail_url)['ETag']]
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(detail_url, data={'text': 'Комментарий'})
+    etags.append(anonymous.get(detail_url)['ETag'])
+    comment = Comment.objects.get(news=news)
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(
+            reverse('news:edit', args=(comment.pk,)), data={'text': 'Правка'}
+        )
+    etags.append(anonymous.get(detail_url)['ETag'])
+    with django_capture_on_commit_callbacks(execute=True):
+        auth_client.post(reverse('news:delete', args=(comment.pk,)))
+    etags.append(anonymous.get(detail_url)['ETag'])
+    for previous, current in zip(etags, etags[1:]):
+        assert previous != current
+
+
+def test_comment_fragments_are_cached(
+        auth_client, admin_client, comment, detail_url
+):
+    """Готовый HTML комментария берётся из кэша, ссылки на
+    редактирование видит только автор комментария.
+    """
+    edit_url = reverse('news:edit', args=(comment.pk,))
+    assert edit_url in auth_client.get(detail_url).content.decode()
+    key = fragment_key(comment)
+    assert comment.text in cache.get(key)
+    cache.set(key, 'Фрагмент из кэша')
+    content = admin_client.get(detail_url).content.decode()
+    assert 'Фрагмент из кэша' in content
+    assert edit_url not in content
+
+
+@pytest.mark.django_db
+def test_comment_fragments_follow_changes(
+        auth_client, comment, detail_url, edit_comment_url,
+        delete_comment_url
+):
+    """Фрагмент удаляется при редактировании и удалении комментария."""
+    auth_client.get(detail_url)
+    key = fragment_key(comment)
+    auth_client.post(edit_comment_url, data={'text': 'Правка'})
+    assert cache.get(key) is None
+    assert 'Правка' in auth_client.get(detail_url).content.decode()
+    comment.refresh_from_db()
+    key = fragment_key(comment)
+    assert cache.get(key) is not None
+    auth_client.post(delete_comment_url)
+    assert cache.get(key) is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_view_renders_in_executor(news):
+    """Асинхронное представление отдаёт отрисованную страницу,
+    а запросы из пула потоков попадают в счётчик запроса.
+    """
+    request = RequestFactory().get(URL_HOME)
+    request.user = AnonymousUser()
+    request.query_counter = QueryCounter()
+    response = async_to_sync(news_list)(request)
+    assert response.status_code == HTTPStatus.OK
+    assert news.title in response.content.decode()
+    assert request.query_counter.count == 2
+
+
+@pytest.mark.django_db
+def test_search_finds_word_forms(client):
+    """Поиск находит другие формы слов и «ё» по «е»,
+    совпадения в заголовке ранжируются выше.
+    """
+    in_text = News.objects.create(
+        title='Зима', text='Снегопад засыпал <b>ёлки</b> в городах.'
+    )
+    in_title = News.objects.create(title='Город и ёлка', text='Текст.')
+    News.objects.create(title='Лето', text='Жара.')
+    response = client.get(reverse('news:search'), {'q': 'Город елки'})
+    found = response.context['page'].object_list
+    assert found == [in_title, in_text]
+    content = response.content.decode()
+    assert '<mark>ёлки</mark>' in content
+    assert '&lt;b&gt;' in content
+
+
+@pytest.mark.django_db
+def test_search_without_full_text_index(client):
+    """На базах без FTS5 поиск работает без индекса."""
+    found = News.objects.create(title='Снег в городе', text='Снегопад.')
+    News.objects.create(title='Лето', text='Жара.')
+    with mock.patch.object(connection, 'vendor', 'postgresql'):
+        response = client.get(reverse('news:search'), {'q': 'городах'})
+    assert response.context['page'].object_list == [found]
+
+
+@pytest.mark.django_db
+def test_search_pages_cover_all_results(client, settings):
+    """Курсорные страницы поиска без пропусков и повторов
+    перечисляют все найденные новости.
+    """
+    settings.NEWS_COUNT_ON_HOME_PAGE = 3
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Футбол ' * (index + 1))
+        for index in range(8)
+    )
+    url = reverse('news:search')
+    seen, after = [], None
+    while True:
+        params = {'q': 'футбола'}
+        if after:
+            params['after'] = after
+        page = client.get(url, params).context['page']
+        seen += [news.pk for news in page.object_list]
+        if not page.has_next():
+            break
+        after = page.next_cursor
+    assert sorted(seen) == sorted(News.objects.values_list('pk', flat=True))
+    assert len(seen) == len(set(seen))
@@ -1,11 +1,21 @@
 from http import HTTPStatus
+from io import StringIO
+import os
 import random
 
 import pytest
+from django.contrib.auth import HASH_SESSION_KEY
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
-from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.counters import flush_at_exit, view_counter
+from news.forms import BAD_WORDS, WARNING, bad_words_filter
+from news.models import Comment, DiscussedNews, News
+from news.throttling import hit
+from yanews.auth import user_cache
 
 
 @pytest.mark.django_db
@@ -23,6 +33,42 @@ def test_user_can_create_comment(auth_client, comment_data, detail_url):
     assert Comment.objects.count() == start_comment_count + 1
 
 
+def test_comments_count_follows_create_and_delete(
+        auth_client, news, comment_data, detail_url
+):
+    """Счётчик комментариев новости меняется при создании и удалении."""
+    auth_client.post(detail_url, data=comment_data)
+    news.refresh_from_db()
+    assert news.comments_count == 1
+    comment = Comment.objects.get(news=news)
+    auth_client.delete(reverse('news:delete', args=(comment.pk,)))
+    news.refresh_from_db()
+    assert news.comments_count == 0
+
+
+def test_discussed_news_follow_create_and_delete(
+        auth_client, news, comment_data, detail_url
+):
+    """Рейтинг обсуждаемых новостей меняется при создании и удалении
+    комментариев.
+    """
+    for _ in range(2):
+        auth_client.post(detail_url, data=comment_data)
+    assert DiscussedNews.objects.get(news=news).comments == 2
+    comment = Comment.objects.filter(news=news).first()
+    auth_client.delete(reverse('news:delete', args=(comment.pk,)))
+    assert DiscussedNews.objects.get(news=news).comments == 1
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(news, comments):
+    """Команда recount_comments восстанавливает счётчик комментариев."""
+    News.objects.update(comments_count=0)
+    call_command('recount_comments', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comments_count == news.comment_set.count()
+
+
 def test_user_cant_use_bad_words(auth_client, news, detail_url):
     """Если комментарий содержит запрещённые слова, он не будет опубликован,
       а форма вернёт ошибку.
@@ -40,6 +86,23 @@ def test_user_cant_use_bad_words(auth_client, news, detail_url):
     assert Comment.objects.count() == start_comment_count
 
 
+def test_bad_words_file_is_reloaded(
+        auth_client, detail_url, tmp_path, monkeypatch
+):
+    """Словарь перечитывается после изменения файла со словами,
+    поиск не зависит от регистра и различия «ё»/«е».
+    """
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# словарь модераторов\n', encoding='utf-8')
+    monkeypatch.setattr(bad_words_filter, 'path', words_file)
+    response = auth_client.post(detail_url, data={'text': 'ЕЖИК'})
+    assert response.status_code == HTTPStatus.FOUND
+    words_file.write_text('ёж\n', encoding='utf-8')
+    os.utime(words_file, ns=(0, 1))
+    response = auth_client.post(detail_url, data={'text': 'ЕЖИК'})
+    assertFormError(response, form='form', field='text', errors=WARNING)
+
+
 @pytest.mark.django_db
 def test_author_can_delete_comment(
     auth_client, detail_url, delete_comment_url
@@ -86,3 +149,181 @@ def test_user_cant_delete_comment_of_another_user(
     )
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.count() == start_comment_count
+
+
+def test_create_comment_queries(
+        auth_client, comment_data, detail_url, django_assert_num_queries
+):
+    """Создание комментария: пользователь, новость, вставка
+    комментария, обновление счётчика и рейтинга обсуждаемых новостей
+    в одной транзакции. Сессия читается из кэша.
+    """
+    with django_assert_num_queries(7):
+        auth_client.post(detail_url, data=comment_data)
+
+
+def test_edit_comment_queries(
+        auth_client, comment_data, edit_comment_url, django_assert_num_queries
+):
+    """Редактирование комментария читает его из базы один раз."""
+    with django_assert_num_queries(3):
+        auth_client.post(edit_comment_url, data=comment_data)
+
+
+def test_delete_comment_queries(
+        auth_client, delete_comment_url, django_assert_num_queries
+):
+    """Удаление комментария читает его из базы один раз."""
+    with django_assert_num_queries(7):
+        auth_client.post(delete_comment_url)
+
+
+def test_comment_rate_is_limited_per_user(
+        auth_client, comment_data, detail_url, settings,
+        django_assert_num_queries
+):
+    """Сверх лимита комментарий отклоняется с кодом 429 и Retry-After
+    до чтения новости из базы.
+    """
+    settings.NEWS_COMMENT_RATE_USER = 2
+    for _ in range(2):
+        auth_client.post(detail_url, data=comment_data)
+    with django_assert_num_queries(0):
+        response = auth_client.post(detail_url, data=comment_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response['Retry-After']) > 0
+    assert Comment.objects.count() == 2
+
+
+def test_comment_rate_is_limited_per_ip(
+        client, django_user_model, comment_data, detail_url, settings
+):
+    """Лимит по IP-адресу общий для всех пользователей."""
+    settings.NEWS_COMMENT_RATE_IP = 2
+    for number in range(3):
+        client.force_login(
+            django_user_model.objects.create(username=f'Читатель {number}')
+        )
+        response = client.post(detail_url, data=comment_data)
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert Comment.objects.count() == 2
+
+
+def test_ip_limit_behind_trusted_proxy(
+        client, django_user_model, comment_data, detail_url, settings
+):
+    """За доверенным прокси лимит считается по адресу читателя
+    из X-Forwarded-For, подставленные клиентом адреса не учитываются.
+    """
+    settings.NEWS_COMMENT_RATE_IP = 1
+    settings.NEWS_TRUSTED_PROXIES = ['127.0.0.1']
+    cases = (
+        ('10.0.0.1', HTTPStatus.FOUND),
+        ('10.0.0.1, 10.0.0.2', HTTPStatus.FOUND),
+        ('10.0.0.2, 10.0.0.1', HTTPStatus.TOO_MANY_REQUESTS),
+    )
+    for number, (forwarded, status) in enumerate(cases):
+        client.force_login(
+            django_user_model.objects.create(username=f'Читатель {number}')
+        )
+        response = client.post(
+            detail_url, data=comment_data, HTTP_X_FORWARDED_FOR=forwarded
+        )
+        assert response.status_code == status
+
+
+def test_rate_window_slides():
+    """Попытки предыдущего окна учитываются пропорционально оставшейся
+    его доле, отклонённые попытки не учитываются.
+    """
+    limits = [('user:1', 4)]
+    for _ in range(4):
+        assert hit(limits, 60, now=50) == 0
+    assert hit(limits, 60, now=59) == 16
+    # В середине следующего окна от прошлых попыток осталась половина.
+    assert hit(limits, 60, now=90) == 0
+    assert hit(limits, 60, now=90) == 0
+    assert hit(limits, 60, now=90) == 15
+
+
+def count_user_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, sum(
+        'FROM "auth_user"' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+def test_user_is_cached_until_changed(auth_client, author, detail_url):
+    """Пользователь читается из базы один раз и заново после изменения
+    или выхода из системы.
+    """
+    assert count_user_queries(auth_client, detail_url)[1] == 1
+    assert count_user_queries(auth_client, detail_url)[1] == 0
+    author.username = 'Новое имя'
+    author.save()
+    response, queries = count_user_queries(auth_client, detail_url)
+    assert queries == 1
+    assert response.context['user'].username == 'Новое имя'
+    auth_client.post(reverse('users:logout'))
+    assert user_cache.get(author.pk) is None
+
+
+def test_password_changed_elsewhere_keeps_session(
+        auth_client, author, detail_url, django_user_model
+):
+    """Пользователь, сменивший пароль в другом процессе, остаётся
+    в системе: устаревшая запись кэша перечитывается из базы.
+    """
+    count_user_queries(auth_client, detail_url)
+    author.set_password('новый пароль')
+    django_user_model.objects.filter(pk=author.pk).update(
+        password=author.password
+    )
+    session = auth_client.session
+    session[HASH_SESSION_KEY] = author.get_session_auth_hash()
+    session.save()
+    response, queries = count_user_queries(auth_client, detail_url)
+    assert queries == 1
+    assert response.context['user'].is_authenticated
+
+
+@pytest.mark.django_db
+def test_views_are_written_in_batches(client, news, detail_url, settings):
+    """Просмотры записываются в базу, когда их накопится достаточно."""
+    settings.NEWS_VIEWS_FLUSH_THRESHOLD = 3
+    for _ in range(2):
+        client.get(detail_url)
+    news.refresh_from_db()
+    assert news.views == 0
+    client.get(detail_url)
+    news.refresh_from_db()
+    assert news.views == 3
+
+
+@pytest.mark.django_db
+def test_views_flush_is_one_update(all_news):
+    """Просмотры многих новостей записываются одним UPDATE."""
+    expected = {}
+    for number, news in enumerate(News.objects.all()):
+        for _ in range(number % 3 + 1):
+            view_counter.add(news.pk)
+        expected[news.pk] = number % 3 + 1
+    with CaptureQueriesContext(connection) as context:
+        assert view_counter.flush() == sum(expected.values())
+    updates = [
+        query for query in context.captured_queries
+        if query['sql'].startswith('UPDATE')
+    ]
+    assert len(updates) == 1
+    assert dict(News.objects.values_list('pk', 'views')) == expected
+
+
+def test_flush_at_exit_skips_unusable_database(caplog):
+    """При завершении процесса без доступной базы просмотры не
+    записываются, а процесс не падает.
+    """
+    view_counter.add(1)
+    flush_at_exit()
+    assert 'База недоступна' in caplog.text
@@ -12,6 +12,7 @@ LOGIN_URL = reverse("users:login")
     'name, args',
     (
         ('news:detail', pytest.lazy_fixture('pk_for_args')),
+        ('news:comments', pytest.lazy_fixture('pk_for_args')),
         ('news:home', None),
         ('users:login', None),
         ('users:logout', None),
@@ -27,6 +28,14 @@ def test_availability_for_anonymous_user(client, name, args):
     assert response.status_code == HTTPStatus.OK
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize('name', ('news:detail', 'news:comments'))
+def test_missing_news_returns_not_found(client, name):
+    """Страницы несуществующей новости отдают 404."""
+    response = client.get(reverse(name, args=(1,)))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'parametrized_client, expected_status',
@@ -0,0 +1,185 @@
+"""
+Полнотекстовый поиск по новостям.
+
+Индекс — виртуальная таблица FTS5 news_search, которую триггеры
+из миграции 0007 держат в согласии с таблицей новостей. На других
+базах миграция индекс не создаёт, и поиск идёт без него.
+"""
+import re
+
+from django.core import signing
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import Http404
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News
+from .pagination import CursorPage, CursorPaginator
+from .profanity import normalize
+
+WORD_RE = re.compile(r'\w+')
+MAX_TERMS = 10
+MIN_STEM = 3
+SNIPPET_WORDS = 30
+CURSOR_SALT = 'news.search'
+# Совпадение в заголовке весит больше, чем в тексте.
+RANK = 'bm25(news_search, 5.0, 1.0)'
+
+# Окончания русских слов, от длинных к коротким.
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ого', 'его',
+    'ому', 'ему', 'ыми', 'ими', 'ешь', 'ишь', 'ете', 'ите', 'ать',
+    'ять', 'ить', 'еть', 'уть', 'ала', 'ила', 'ыла', 'ели', 'али',
+    'или', 'ые', 'ие', 'ое', 'ее', 'ей', 'ий', 'ый', 'ой', 'ем', 'им',
+    'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею', 'ов',
+    'ев', 'ам', 'ям', 'ах', 'ях', 'ия', 'ию', 'ья', 'ью', 'ет', 'ит',
+    'ут', 'ют', 'ат', 'ят', 'ть', 'ла', 'ли', 'ло', 'ся', 'сь', 'а',
+    'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+REBUILD_SQL = (
+    'DELETE FROM news_search',
+    "INSERT INTO news_search (rowid, title, text) SELECT id, "
+    "replace(replace(title, 'ё', 'е'), 'Ё', 'Е'), "
+    "replace(replace(text, 'ё', 'е'), 'Ё', 'Е') FROM news_news",
+    "INSERT INTO news_search (news_search) VALUES ('optimize')",
+)
+
+
+def stem(word):
+    """
+    Облегчённый стеммер: отрезает самое длинное окончание,
+    оставляя основу не короче MIN_STEM букв.
+    """
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def query_stems(text):
+    """Основы слов поискового запроса без повторов."""
+    stems = []
+    for word in WORD_RE.findall(normalize(text)):
+        word = stem(word)
+        if word not in stems:
+            stems.append(word)
+    return stems[:MAX_TERMS]
+
+
+def match_expression(stems):
+    """Запрос FTS5: все основы как префиксы слов."""
+    return ' '.join(f'"{word}"*' for word in stems)
+
+
+def highlight(text, stems, size=SNIPPET_WORDS):
+    """
+    Фрагмент текста вокруг первого совпадения, найденные слова
+    выделены тегом <mark>, остальное экранировано.
+    """
+    words = list(WORD_RE.finditer(text))
+    if not words:
+        return ''
+    prefixes = tuple(stems)
+    hits = {
+        index for index, match in enumerate(words)
+        if normalize(match.group()).startswith(prefixes)
+    }
+    start = max(0, min(hits, default=0) - size // 3)
+    window = words[start:start + size]
+    parts = ['…'] if start else []
+    position = window[0].start() if start else 0
+    for index, match in enumerate(window, start=start):
+        parts.append(escape(text[position:match.start()]))
+        word = escape(match.group())
+        parts.append(f'<mark>{word}</mark>' if index in hits else word)
+        position = match.end()
+    if start + size < len(words):
+        parts.append('…')
+    else:
+        parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
+
+
+def search(text, per_page, after=None):
+    """
+    Страница найденных новостей в порядке релевантности.
+
+    Курсор — пара (оценка bm25, id) последней новости страницы.
+    У новостей на странице заполнены атрибуты title_highlight
+    и snippet.
+    """
+    stems = query_stems(text)
+    if not stems:
+        return CursorPage([])
+    if connection.vendor != 'sqlite':
+        return fallback_search(stems, per_page, after)
+    sql = (
+        f'SELECT id, score FROM (SELECT rowid AS id, {RANK} AS score '
+        'FROM news_search WHERE news_search MATCH %s)'
+    )
+    params = [match_expression(stems)]
+    if after:
+        key = decode_cursor(after)
+        sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+        params += [key[0], key[0], key[1]]
+    sql += ' ORDER BY score, id LIMIT %s'
+    params.append(per_page)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    news = News.objects.in_bulk([pk for pk, _ in rows])
+    object_list = []
+    for pk, _ in rows:
+        if pk in news:
+            item = news[pk]
+            item.title_highlight = highlight(item.title, stems)
+            item.snippet = highlight(item.text, stems)
+            object_list.append(item)
+    next_cursor = None
+    if len(rows) == per_page:
+        pk, score = rows[-1]
+        next_cursor = signing.dumps([score, pk], salt=CURSOR_SALT)
+    return CursorPage(object_list, next_cursor)
+
+
+def fallback_search(stems, per_page, after=None):
+    """
+    Поиск без индекса для баз, отличных от SQLite: новости,
+    содержащие все основы, от новых к старым.
+    """
+    condition = Q()
+    for word in stems:
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    page = CursorPaginator(
+        News.objects.filter(condition), ('-date', '-id'), per_page,
+        salt=CURSOR_SALT + '.date',
+    ).get_page(after=after)
+    page.object_list = list(page.object_list)
+    for item in page.object_list:
+        item.title_highlight = highlight(item.title, stems)
+        item.snippet = highlight(item.text, stems)
+    return page
+
+
+def decode_cursor(cursor):
+    try:
+        key = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise Http404('Некорректный курсор страницы.')
+    if (
+        not isinstance(key, list) or len(key) != 2
+        or not isinstance(key[0], (int, float))
+        or not isinstance(key[1], int)
+    ):
+        raise Http404('Некорректный курсор страницы.')
+    return key
+
+
+def rebuild_index():
+    """Заново заполняет индекс по таблице новостей."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for statement in REBUILD_SQL:
+            cursor.execute(statement)
+    return News.objects.count()
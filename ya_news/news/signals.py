@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import LIST_SCOPE, bump_on_commit, detail_scope
+from .models import Comment, News
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def news_changed(sender, instance, **kwargs):
+    bump_on_commit(LIST_SCOPE, detail_scope(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_on_commit(detail_scope(instance.news_id), LIST_SCOPE)
+    else:
+        bump_on_commit(detail_scope(instance.news_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    bump_on_commit(detail_scope(instance.news_id), LIST_SCOPE)
@@ -0,0 +1,135 @@
+"""
+Ограничение частоты комментариев от одного пользователя и с одного
+IP-адреса.
+
+Пропускная способность та же, что у ведра токенов: не больше limit
+попыток за NEWS_COMMENT_RATE_PERIOD секунд. Состояние хранится
+в общем кэше и меняется только атомарными add/incr, без чтения
+и записи целого значения, поэтому одновременные запросы из разных
+процессов не теряют попыток. Используется скользящее окно: счётчик
+текущего окна складывается с долей счётчика предыдущего, так что
+на стыке окон нельзя отправить вдвое больше лимита.
+
+Проверка выполняется до чтения новости и валидации формы и в обычном
+случае стоит одно чтение и одно увеличение счётчика в кэше на лимит.
+"""
+import math
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RATE_KEY = 'news:rate:{ident}:{window}'
+
+
+def client_address(request):
+    """
+    IP-адрес, с которого пришёл запрос.
+
+    Если REMOTE_ADDR — доверенный прокси из NEWS_TRUSTED_PROXIES,
+    адрес берётся из X-Forwarded-For справа налево, пока не встретится
+    адрес не из списка. Левее него значения записал сам клиент и мог
+    их подделать.
+    """
+    address = request.META.get('REMOTE_ADDR')
+    forwarded = [
+        hop.strip()
+        for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+        if hop.strip()
+    ]
+    while forwarded and address in settings.NEWS_TRUSTED_PROXIES:
+        address = forwarded.pop()
+    return address
+
+
+def comment_limits(request):
+    """Пары (идентификатор, лимит) для автора комментария."""
+    limits = []
+    if settings.NEWS_COMMENT_RATE_USER:
+        limits.append(
+            (f'user:{request.user.pk}', settings.NEWS_COMMENT_RATE_USER)
+        )
+    address = client_address(request)
+    if settings.NEWS_COMMENT_RATE_IP and address:
+        limits.append((f'ip:{address}', settings.NEWS_COMMENT_RATE_IP))
+    return limits
+
+
+def incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def retry_after(limit, period, previous, current, elapsed):
+    """
+    Секунды до момента, когда ещё одна попытка уложится в лимит.
+
+    previous и current — попытки в предыдущем и текущем окне,
+    elapsed — сколько секунд прошло от начала текущего окна.
+    """
+    if current < limit:
+        wait = period * (1 - (limit - current - 1) / previous) - elapsed
+    else:
+        # Ждём следующего окна, в котором current станет предыдущим.
+        wait = period - elapsed + period * (1 - (limit - 1) / current)
+    return max(1, math.ceil(wait))
+
+
+def hit(limits, period, now=None):
+    """
+    Учитывает попытку по каждому лимиту.
+
+    Возвращает 0, если попытка разрешена, иначе число секунд до
+    следующей разрешённой попытки. Отклонённая попытка не учитывается,
+    чтобы клиент, выждавший Retry-After, не был отклонён снова.
+    """
+    if not limits:
+        return 0
+    if now is None:
+        now = time.time()
+    window, elapsed = divmod(now, period)
+    window = int(window)
+    previous_keys = [
+        RATE_KEY.format(ident=ident, window=window - 1)
+        for ident, _ in limits
+    ]
+    keys = [
+        RATE_KEY.format(ident=ident, window=window) for ident, _ in limits
+    ]
+    previous_counts = cache.get_many(previous_keys)
+    wait = 0
+    for (_, limit), previous_key, key in zip(limits, previous_keys, keys):
+        previous = previous_counts.get(previous_key, 0)
+        count = incr(key, period * 2)
+        if previous * (period - elapsed) / period + count > limit:
+            wait = max(wait, retry_after(
+                limit, period, previous, count - 1, elapsed
+            ))
+    if wait:
+        for key in keys:
+            try:
+                cache.decr(key)
+            except ValueError:
+                pass
+    return wait
+
+
+def check_comment_rate(request):
+    """0 или число секунд, через которое автор сможет комментировать."""
+    return hit(comment_limits(request), settings.NEWS_COMMENT_RATE_PERIOD)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много комментариев, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=HTTPStatus.TOO_MANY_REQUESTS,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
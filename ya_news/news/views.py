@@ -1,39 +1,149 @@
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.http import Http404, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from .cache import AnonymousPageCacheMixin, detail_scope
+from .counters import view_counter
+from .etags import detail_etag, list_etag
 from .forms import CommentForm
+from .fragments import forget_fragment, render_fragments
+from .leaderboard import cached_top, forget_comment, record_comment
 from .models import Comment, News
+from .pagination import CursorPaginator
+from .search import search
+from .throttling import check_comment_rate, too_many_requests
 
 
-class NewsList(generic.ListView):
+@method_decorator(condition(etag_func=list_etag), name='dispatch')
+class NewsList(AnonymousPageCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
+    ordering = ('-date', '-id')
+    # Порядок ленты из параметра order: самые читаемые новости
+    # сортируются по индексу (views, id).
+    orderings = {
+        'popular': ('-views', '-id'),
+    }
+
+    def get_ordering(self):
+        return self.orderings.get(self.request.GET.get('order'), self.ordering)
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
-
-        Их количество определяется в настройках проекта.
+        Число комментариев берётся из поля comments_count,
+        сами комментарии не загружаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()
+
+    def get_paginate_by(self, queryset):
+        """Количество новостей на странице определяется в настройках."""
+        return settings.NEWS_COUNT_ON_HOME_PAGE
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        ordering = self.get_ordering()
+        salt = 'news.list' if ordering == self.ordering else 'news.popular'
+        return CursorPaginator(queryset, ordering, per_page, salt)
+
+    def paginate_queryset(self, queryset, page_size):
+        """Курсорная пагинация по ключу (date, id) или (views, id)."""
+        paginator = self.get_paginator(queryset, page_size)
+        page = paginator.get_page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        order = self.request.GET.get('order')
+        context['order'] = order if order in self.orderings else None
+        context['discussed'] = cached_top(settings.NEWS_DISCUSSED_COUNT)
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Полнотекстовый поиск по новостям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['page'] = search(
+            query,
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+            after=self.request.GET.get('after'),
+        )
+        return context
+
+
+class CachedObjectMixin:
+    """
+    Запоминает объект, найденный get_object(), до конца запроса.
+
+    Повторные вызовы get_object() (например, из get_success_url)
+    не выполняют запрос к базе ещё раз.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_cached_object'):
+            self._cached_object = super().get_object()
+        return self._cached_object
+
+
+def get_comments_paginator(news_pk):
+    """
+    Комментарии к новости в порядке (created, id).
+
+    Размер страницы ограничен настройкой COMMENTS_COUNT_ON_PAGE,
+    поэтому запрос не зависит от длины обсуждения.
+    """
+    return CursorPaginator(
+        Comment.objects.filter(news_id=news_pk).select_related('author'),
+        ('created', 'id'),
+        settings.COMMENTS_COUNT_ON_PAGE,
+        salt='news.comments',
+    )
+
+
+def get_comments_page(news_pk, after=None):
+    page = get_comments_paginator(news_pk).get_page(after=after)
+    render_fragments(page.object_list)
+    return page
+
 
+class CommentsPageMixin:
+    """Добавляет в контекст первую страницу комментариев новости."""
 
-class NewsDetail(generic.DetailView):
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = get_comments_page(self.object.pk)
+        return context
+
+
+@method_decorator(condition(etag_func=detail_etag), name='dispatch')
+class NewsDetail(
+        AnonymousPageCacheMixin, CommentsPageMixin, generic.DetailView
+):
     model = News
     template_name = 'news/detail.html'
 
+    def get_cache_scope(self):
+        return detail_scope(self.kwargs['pk'])
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +152,33 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsComments(generic.TemplateView):
+    """Следующая страница комментариев для подгрузки на странице новости."""
+    template_name = 'news/comments.html'
+
+    def get_context_data(self, **kwargs):
+        """
+        Пустая страница бывает и у несуществующей новости, поэтому
+        только в этом случае новость проверяется отдельным запросом.
+        """
+        context = super().get_context_data(**kwargs)
+        context['news_pk'] = self.kwargs['pk']
+        page = get_comments_page(
+            self.kwargs['pk'], after=self.request.GET.get('after')
+        )
+        if (
+            not page.object_list
+            and not News.objects.filter(pk=self.kwargs['pk']).exists()
+        ):
+            raise Http404('Новость не найдена.')
+        context['comments_page'] = page
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
+        CachedObjectMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -52,6 +187,10 @@ class NewsComment(
     template_name = 'news/detail.html'
 
     def post(self, request, *args, **kwargs):
+        """Частота комментариев проверяется до обращения к базе."""
+        retry_after = check_comment_rate(request)
+        if retry_after:
+            return too_many_requests(retry_after)
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
@@ -59,38 +198,53 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            News.objects.filter(pk=self.object.pk).update(
+                comments_count=F('comments_count') + 1
+            )
+            record_comment(self.object.pk)
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
 
     def get(self, request, *args, **kwargs):
+        """
+        Просмотр засчитывается и для ответа из кэша, и для 304:
+        страницу всё равно показали читателю.
+        """
         view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        response = view(request, *args, **kwargs)
+        if request.method == 'GET' and response.status_code in (200, 304):
+            view_counter.add(kwargs['pk'])
+        return response
 
     def post(self, request, *args, **kwargs):
         view = NewsComment.as_view()
         return view(request, *args, **kwargs)
 
 
-class CommentBase(LoginRequiredMixin):
+class CommentBase(LoginRequiredMixin, CachedObjectMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
         comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': comment.news_id}
         ) + '#comments'
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.filter(
+            author=self.request.user
+        ).select_related('news')
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +252,24 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        forget_fragment(self.object)
+        return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        # После delete() у объекта нет pk, ключ фрагмента не построить.
+        forget_fragment(self.object)
+        with transaction.atomic():
+            self.object.delete()
+            News.objects.filter(pk=self.object.news_id).update(
+                comments_count=Greatest(F('comments_count') - 1, 0)
+            )
+            forget_comment(self.object)
+        return HttpResponseRedirect(success_url)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -21,11 +22,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanews.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanews.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,3 +82,112 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_PAGE = 50
+
+# Время жизни закэшированных страниц новостей для анонимных читателей.
+NEWS_PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни готового HTML комментария в кэше.
+NEWS_COMMENT_FRAGMENT_TIMEOUT = 60 * 60
+
+# Просмотры новостей записываются в базу, когда их накопится
+# NEWS_VIEWS_FLUSH_THRESHOLD или пройдёт NEWS_VIEWS_FLUSH_INTERVAL
+# секунд, по NEWS_VIEWS_FLUSH_BATCH_SIZE новостей в одном UPDATE.
+NEWS_VIEWS_FLUSH_THRESHOLD = 1000
+NEWS_VIEWS_FLUSH_INTERVAL = 60
+NEWS_VIEWS_FLUSH_BATCH_SIZE = 400
+# Записывать оставшиеся просмотры при завершении процесса сервера.
+# Скрипты, работающие с временной базой, отключают запись.
+NEWS_VIEWS_FLUSH_AT_EXIT = True
+
+# Блок самых обсуждаемых новостей: период в днях и размер блока.
+NEWS_DISCUSSED_WINDOW_DAYS = 7
+NEWS_DISCUSSED_COUNT = 5
+
+# Не больше NEWS_COMMENT_RATE_USER комментариев от одного пользователя
+# и NEWS_COMMENT_RATE_IP с одного IP-адреса за NEWS_COMMENT_RATE_PERIOD
+# секунд, 0 отключает ограничение. Счётчики хранятся в кэше, поэтому
+# при нескольких процессах нужен общий кэш DJANGO_MEMCACHED_LOCATION.
+NEWS_COMMENT_RATE_USER = 5
+NEWS_COMMENT_RATE_IP = 30
+NEWS_COMMENT_RATE_PERIOD = 60
+
+# Адреса обратных прокси через запятую. Запросы от них несут адрес
+# читателя в X-Forwarded-For, иначе лимит по IP берётся по REMOTE_ADDR.
+# За прокси, которого нет в списке, лимит по IP стал бы общим
+# для всех читателей сайта.
+NEWS_TRUSTED_PROXIES = [
+    address.strip()
+    for address in os.environ.get('DJANGO_TRUSTED_PROXIES', '').split(',')
+    if address.strip()
+]
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+BAD_WORDS_FILE = BASE_DIR / 'bad_words.txt'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanews.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Общий для всех процессов кэш memcached, например 127.0.0.1:11211
+# (нужен пакет pymemcache). Без него у каждого процесса свой
+# LocMemCache.
+MEMCACHED_LOCATION = os.environ.get('DJANGO_MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        },
+    }
+
+# С общим кэшем сессии хранятся в кэше и в базе, база читается только
+# при промахе кэша. Без общего кэша сессия, удалённая при выходе
+# в одном процессе, оставалась бы в кэше других, поэтому сессии
+# читаются из базы. С django.contrib.sessions.backends.signed_cookies
+# сессия хранится в подписанной cookie и не требует ни кэша, ни базы.
+SESSION_ENGINE = os.environ.get(
+    'DJANGO_SESSION_ENGINE',
+    'django.contrib.sessions.backends.'
+    + ('cached_db' if MEMCACHED_LOCATION else 'db'),
+)
+
+AUTHENTICATION_BACKENDS = ['yanews.auth.CachedModelBackend']
+
+# Сколько секунд процесс помнит прочитанного из базы пользователя,
+# 0 отключает кэш.
+AUTH_USER_CACHE_TIMEOUT = 30
+# Наибольшее число пользователей в кэше процесса.
+AUTH_USER_CACHE_SIZE = 1000
+
+# Допустимое число SQL-запросов на один запрос к представлению.
+# Бюджет включает чтение сессии из базы и пользователя, если его нет
+# в кэше процесса.
+QUERY_BUDGETS = {
+    'news:home': 6,
+    'news:detail': 8,
+    'news:comments': 3,
+    'news:search': 4,
+    'news:edit': 4,
+    'news:delete': 8,
+}
+
+# Асинхронные представления страниц включаются в asgi.py
+# через переменную окружения DJANGO_ASYNC_VIEWS.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Размер пула потоков, в котором выполняются асинхронные представления.
+ASYNC_VIEWS_WORKERS = 8
@@ -0,0 +1,178 @@
+"""
+Пакетное изменение заметок через JSON API.
+
+Тело запроса — объект {"operations": [...]}, операции бывают трёх видов:
+- {"op": "create", "data": {"title", "text", "slug"}};
+- {"op": "update", "slug": "<slug заметки>", "data": {...}};
+- {"op": "delete", "slug": "<slug заметки>"}.
+Пакет применяется целиком в одной транзакции или не применяется вовсе.
+"""
+import json
+
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import transaction
+
+from .forms import WARNING, NoteForm
+from .models import Note
+
+OPERATIONS = ('create', 'update', 'delete')
+
+
+class BatchError(Exception):
+    """Тело запроса не является пакетом операций."""
+
+
+class BatchNoteForm(NoteForm):
+    """
+    NoteForm без запроса к базе для каждой заметки.
+
+    Занятость slug проверяет NoteBatch сразу для всего пакета.
+    """
+
+    def clean_slug(self):
+        return self.cleaned_data.get('slug')
+
+
+def parse_operations(body, max_size):
+    """Список операций из тела запроса."""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise BatchError('Тело запроса должно быть JSON.')
+    operations = payload.get('operations') if isinstance(
+        payload, dict
+    ) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('Ожидается непустой список operations.')
+    if len(operations) > max_size:
+        raise BatchError(f'В пакете не может быть больше {max_size} операций.')
+    return operations
+
+
+def error(message, code, field=NON_FIELD_ERRORS):
+    """Ошибка в том же виде, что и Form.errors.get_json_data()."""
+    return {field: [{'message': message, 'code': code}]}
+
+
+class NoteBatch:
+    """
+    Проверяет и применяет пакет операций над заметками автора.
+
+    Заметки для изменения и удаления читаются из queryset автора одним
+    запросом, занятость всех указанных slug проверяется ещё одним.
+    Поля заметок проверяются правилами NoteForm.
+    """
+
+    def __init__(self, queryset, author, operations):
+        self.queryset = queryset
+        self.author = author
+        self.operations = operations
+        self.errors = [None] * len(operations)
+        self.results = []
+        self.forms = {}
+        self.deleted = {}
+
+    def is_valid(self):
+        targets = self.queryset.in_bulk(
+            self.target_slugs(), field_name='slug'
+        )
+        touched = set()
+        for index, operation in enumerate(self.operations):
+            self.errors[index] = self.prepare(
+                index, operation, targets, touched
+            )
+        self.check_slugs()
+        self.results = [
+            {'status': 'error', 'errors': errors} if errors
+            else {'status': 'valid'}
+            for errors in self.errors
+        ]
+        return not any(self.errors)
+
+    def target_slugs(self):
+        return {
+            operation['slug'] for operation in self.operations
+            if isinstance(operation, dict)
+            and operation.get('op') in ('update', 'delete')
+            and isinstance(operation.get('slug'), str)
+        }
+
+    def prepare(self, index, operation, targets, touched):
+        """Проверяет одну операцию, возвращает её ошибки или None."""
+        kind = operation.get('op') if isinstance(operation, dict) else None
+        if kind not in OPERATIONS:
+            return error('Неизвестная операция.', 'invalid')
+        note = None
+        if kind != 'create':
+            slug = operation.get('slug')
+            note = targets.get(slug) if isinstance(slug, str) else None
+            if note is None:
+                return error('Заметка не найдена.', 'not_found')
+            if note.pk in touched:
+                return error(
+                    'Заметка уже изменяется в этом пакете.', 'duplicate'
+                )
+            touched.add(note.pk)
+        if kind == 'delete':
+            self.deleted[index] = note
+            return None
+        data = operation.get('data')
+        if not isinstance(data, dict):
+            return error('Не переданы данные заметки.', 'invalid')
+        form = BatchNoteForm(data, instance=note)
+        if not form.is_valid():
+            return form.errors.get_json_data()
+        self.forms[index] = form
+        return None
+
+    def check_slugs(self):
+        """
+        Slug не должен принадлежать другой заметке или повторяться
+        в пакете. Slug удаляемых заметок освобождается: удаление
+        выполняется первым.
+        """
+        claims = {}
+        for index, form in self.forms.items():
+            slug = form.cleaned_data['slug']
+            if slug:
+                claims.setdefault(slug, []).append(index)
+        owners = dict(Note.objects.filter(
+            slug__in=claims
+        ).values_list('slug', 'pk'))
+        freed = {note.pk for note in self.deleted.values()}
+        for slug, indexes in claims.items():
+            owner = owners.get(slug)
+            for position, index in enumerate(indexes):
+                if position or owner not in (
+                    None, self.forms[index].instance.pk, *freed
+                ):
+                    self.errors[index] = error(
+                        slug + WARNING, 'unique', 'slug'
+                    )
+                    del self.forms[index]
+
+    @transaction.atomic
+    def apply(self):
+        """
+        Записывает пакет. Заметки с пустым slug сохраняются последними,
+        чтобы подбор свободного slug уже видел slug остальных заметок.
+        """
+        if self.deleted:
+            self.queryset.filter(
+                pk__in=[note.pk for note in self.deleted.values()]
+            ).delete()
+        for index, note in self.deleted.items():
+            self.results[index] = {'status': 'deleted', 'slug': note.slug}
+        for index, form in sorted(
+            self.forms.items(),
+            key=lambda item: not item[1].cleaned_data['slug'],
+        ):
+            created = form.instance._state.adding
+            if created:
+                form.instance.author = self.author
+            note = form.save()
+            self.results[index] = {
+                'status': 'created' if created else 'updated',
+                'id': note.pk,
+                'slug': note.slug,
+            }
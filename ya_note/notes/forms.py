@@ -1,8 +1,8 @@
 from django import forms
 from django.core.exceptions import ValidationError
-from pytils.translit import slugify
 
 from .models import Note
+from .transfer import FORMATS
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
@@ -15,14 +15,41 @@ class NoteForm(forms.ModelForm):
         fields = ('title', 'text', 'slug')
 
     def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
+        """
+        Проверяет, что указанный slug не занят.
+
+        Пустой slug не проверяется: свободный адрес подберёт Note.save.
+        """
+        slug = self.cleaned_data.get('slug')
+        if slug and Note.objects.filter(
                 slug=slug
         ).exclude(id=self.instance.pk).exists():
             raise ValidationError(slug + WARNING)
         return slug
+
+    def validate_unique(self):
+        """Уникальность slug уже проверена в clean_slug."""
+        exclude = self._get_validation_exclusions()
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла с заметками."""
+    file = forms.FileField(
+        label='Файл',
+        help_text='Выгрузка заметок в формате JSONL или zip-архив.'
+    )
+
+    def clean_file(self):
+        file = self.cleaned_data['file']
+        if self.get_format(file) not in FORMATS:
+            raise ValidationError('Поддерживаются файлы .jsonl и .zip.')
+        return file
+
+    @staticmethod
+    def get_format(file):
+        return file.name.rsplit('.', 1)[-1].lower()
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from notes.models import Note
+from notes.views import NoteBase
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит планы выполнения (EXPLAIN) запросов, которые выполняют '
+        'представления ya_note, на данных текущей базы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--compare', action='store_true',
+            help=(
+                'Дополнительно показать планы без составных индексов. '
+                'Индексы удаляются в транзакции, которая затем '
+                'откатывается (SQLite и PostgreSQL).'
+            )
+        )
+
+    def handle(self, *args, **options):
+        note = Note.objects.order_by('-id').select_related('author').first()
+        if note is None:
+            raise CommandError(
+                'Нужна хотя бы одна заметка, заполните базу командой '
+                'seed_load.'
+            )
+        querysets = self.querysets(note)
+        if options['compare']:
+            # SQLite кэширует подготовленные запросы соединения,
+            # поэтому каждый набор планов строится в новом соединении.
+            connection.close()
+            with transaction.atomic():
+                self.drop_indexes()
+                self.explain('Без составных индексов', querysets)
+                transaction.set_rollback(True)
+            connection.close()
+        self.explain('С индексами', querysets)
+
+    def querysets(self, note):
+        """Запросы представлений в том виде, в котором их строят views."""
+        view = NoteBase()
+        view.request = SimpleNamespace(user=note.author)
+        return (
+            ('notes:list', view.get_queryset()),
+            (
+                'notes:detail / notes:edit / notes:delete',
+                view.get_queryset().filter(slug=note.slug),
+            ),
+        )
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in Note._meta.indexes:
+                cursor.execute(
+                    f'DROP INDEX {connection.ops.quote_name(index.name)}'
+                )
+
+    def explain(self, title, querysets):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {title} =='))
+        for name, queryset in querysets:
+            self.stdout.write(self.style.MIGRATE_LABEL(name))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(queryset.explain())
+            self.stdout.write('')
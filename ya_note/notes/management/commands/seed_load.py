@@ -0,0 +1,136 @@
+import multiprocessing
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from notes.models import Note, User
+from notes.slugs import slugify
+
+WORDS = (
+    'список', 'покупок', 'идеи', 'для', 'отпуска', 'рецепт', 'пирога',
+    'план', 'на', 'неделю', 'книги', 'фильмы', 'встреча', 'с', 'командой',
+    'заметки', 'лекции', 'по', 'истории', 'ремонт', 'кухни', 'подарки',
+    'день', 'рождения', 'тренировка', 'дача', 'проект', 'отчёт', 'письмо',
+)
+# Данные, общие для рабочих процессов (наследуются при fork).
+shared = {}
+
+
+def title_for(rng):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(1, 5))).capitalize()
+
+
+def zipf_cum_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для random.choices."""
+    return list(accumulate(1 / (rank ** exponent)
+                           for rank in range(1, size + 1)))
+
+
+def create_users(start, count, seed, batch_size):
+    for offset in range(start, start + count, batch_size):
+        User.objects.bulk_create(
+            User(username=f'{shared["prefix"]}{index}',
+                 password=shared['password'])
+            for index in range(offset, min(offset + batch_size, start + count))
+        )
+
+
+def create_notes(start, count, seed, batch_size):
+    """
+    Заметки с кириллическими заголовками.
+
+    Заголовки часто повторяются, поэтому к slug из pytils добавляется
+    номер заметки в текущем запуске — так slug остаётся уникальным.
+    """
+    rng = random.Random(seed)
+    slug_length = Note._meta.get_field('slug').max_length
+    for offset in range(start, start + count, batch_size):
+        size = min(batch_size, start + count - offset)
+        authors = rng.choices(
+            shared['user_ids'], cum_weights=shared['user_weights'], k=size
+        )
+        notes = []
+        for index, author_id in enumerate(authors, start=offset):
+            title = title_for(rng)
+            suffix = f'-{shared["tag"]}{index:x}'
+            notes.append(Note(
+                title=title,
+                text=' '.join(rng.choices(WORDS, k=rng.randint(10, 200))),
+                slug=slugify(title)[:slug_length - len(suffix)] + suffix,
+                author_id=author_id,
+            ))
+        Note.objects.bulk_create(notes)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу ya_note синтетическими пользователями и заметками '
+        'для нагрузочного тестирования.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=(
+                'Число процессов для записи. Имеет смысл для СУБД '
+                'с параллельной записью (PostgreSQL), SQLite '
+                'сериализует запись.'
+            )
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель распределения Ципфа заметок по авторам.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь.')
+        self.options = options
+        shared['tag'] = f'{time.time_ns():x}'[-8:]
+        shared['prefix'] = f'load-{shared["tag"]}-'
+        shared['password'] = make_password('load-test')
+
+        self.run('Пользователи', create_users, options['users'])
+        shared['user_ids'] = list(User.objects.filter(
+            username__startswith=shared['prefix']
+        ).values_list('pk', flat=True))
+        random.Random(options['seed']).shuffle(shared['user_ids'])
+        shared['user_weights'] = zipf_cum_weights(
+            len(shared['user_ids']), options['skew']
+        )
+        self.run('Заметки', create_notes, options['notes'])
+        shared.clear()
+
+    def run(self, title, func, total):
+        """Делит total строк между процессами и выполняет func."""
+        if total < 1:
+            return
+        started = time.perf_counter()
+        workers = max(1, min(self.options['workers'], total))
+        chunk = -(-total // workers)
+        tasks = [
+            (start, min(chunk, total - start), self.options['seed'] + start,
+             self.options['batch_size'])
+            for start in range(0, total, chunk)
+        ]
+        if workers == 1:
+            for task in tasks:
+                func(*task)
+        else:
+            connections.close_all()
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers) as pool:
+                pool.starmap(func, tasks)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{title}: {total} за {elapsed:.1f} с '
+            f'({total / elapsed if elapsed else 0:.0f} в секунду)'
+        )
@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Текст хранится с «е» вместо «ё»: токенизатор unicode61
+# приводит регистр, но не отождествляет эти буквы.
+NORMALIZED = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+# Автор хранится токеном u<id>, по которому поиск ограничивается
+# заметками одного пользователя.
+VALUES = (
+    f"new.id, {NORMALIZED.format('new.title')}, "
+    f"{NORMALIZED.format('new.text')}, 'u' || new.author_id"
+)
+
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE notes_search USING fts5("
+    "title, text, owner, tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER notes_search_insert AFTER INSERT ON notes_note BEGIN "
+    "INSERT INTO notes_search (rowid, title, text, owner) "
+    f"VALUES ({VALUES}); END",
+    "CREATE TRIGGER notes_search_update "
+    "AFTER UPDATE OF title, text, author_id ON notes_note BEGIN "
+    "DELETE FROM notes_search WHERE rowid = old.id; "
+    "INSERT INTO notes_search (rowid, title, text, owner) "
+    f"VALUES ({VALUES}); END",
+    "CREATE TRIGGER notes_search_delete AFTER DELETE ON notes_note BEGIN "
+    "DELETE FROM notes_search WHERE rowid = old.id; END",
+    "INSERT INTO notes_search (rowid, title, text, owner) "
+    f"SELECT {VALUES.replace('new.', '')} FROM notes_note",
+)
+
+DROP_SQL = (
+    'DROP TRIGGER IF EXISTS notes_search_insert',
+    'DROP TRIGGER IF EXISTS notes_search_update',
+    'DROP TRIGGER IF EXISTS notes_search_delete',
+    'DROP TABLE IF EXISTS notes_search',
+)
+
+
+def run_sqlite(statements):
+    """Полнотекстовый индекс FTS5 есть только в SQLite."""
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_note_author_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sqlite(CREATE_SQL), run_sqlite(DROP_SQL)),
+    ]
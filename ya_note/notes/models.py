@@ -1,10 +1,14 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
-from pytils.translit import slugify
+from django.db import IntegrityError, models, transaction
+
+from .slugs import allocate_slug
 
 User = get_user_model()
 
+# Сколько раз подбирать slug заново при конфликте с другим запросом.
+SLUG_ATTEMPTS = 3
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -30,11 +34,32 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug заменяется свободным slug заголовка.
+
+        Если параллельный запрос успел занять тот же slug, сохранение
+        откатывается до точки сохранения и повторяется с новым slug.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        max_slug_length = self._meta.get_field('slug').max_length
+        for attempt in range(SLUG_ATTEMPTS):
+            self.slug = allocate_slug(
+                Note.objects.exclude(pk=self.pk), self.title, max_slug_length
+            )
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                self.slug = ''
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
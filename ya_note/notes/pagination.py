@@ -0,0 +1,154 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from django.core import signing
+from django.db.models import Q
+from django.http import Http404
+
+
+@dataclass
+class CursorPage:
+    """Страница выборки с курсорами соседних страниц."""
+    object_list: object
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset-пагинация по набору полей сортировки.
+
+    Вместо OFFSET страница выбирается условием на значения ключа
+    последней показанной записи, поэтому любая страница читается
+    по индексу так же быстро, как первая. Курсоры подписаны
+    и непрозрачны для клиента.
+    """
+
+    def __init__(self, queryset, ordering, per_page, salt):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.salt = salt
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after или перед before."""
+        if before:
+            return self._page_before(self._decode(before))
+        key = self._decode(after) if after else None
+        object_list = self.page_queryset(key)
+        rows = list(object_list)
+        next_cursor = None
+        if len(rows) == self.per_page:
+            next_cursor = self._encode(self._key_of(rows[-1]))
+        previous_cursor = None
+        if key is not None:
+            previous_cursor = self._encode(
+                self._key_of(rows[0]) if rows else key
+            )
+        return CursorPage(object_list, next_cursor, previous_cursor)
+
+    def page_queryset(self, key=None):
+        """Запрос страницы, следующей за ключом key (или первой)."""
+        queryset = self.queryset.order_by(*self.ordering)
+        if key is not None:
+            queryset = queryset.filter(self._keyset_filter(key))
+        return queryset[:self.per_page]
+
+    def _page_before(self, key):
+        """
+        Страница, предшествующая курсору.
+
+        Сначала по индексу в обратном порядке читаются только ключи,
+        затем сама страница выбирается в прямом порядке.
+        """
+        keys = list(
+            self.queryset.order_by(*self._reversed_ordering()).filter(
+                self._keyset_filter(key, reverse=True)
+            ).values_list(*self.fields)[:self.per_page + 1]
+        )
+        if not keys:
+            return self.get_page()
+        first_key = keys[:self.per_page][-1]
+        object_list = self.queryset.order_by(*self.ordering).filter(
+            self._keyset_filter(first_key, inclusive=True),
+            self._keyset_filter(key, reverse=True),
+        )[:self.per_page]
+        rows = list(object_list)
+        if not rows:
+            return self.get_page()
+        previous_cursor = None
+        if len(keys) > self.per_page:
+            previous_cursor = self._encode(self._key_of(rows[0]))
+        return CursorPage(
+            object_list, self._encode(self._key_of(rows[-1])), previous_cursor
+        )
+
+    def _reversed_ordering(self):
+        return [
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        ]
+
+    def _keyset_filter(self, key, reverse=False, inclusive=False):
+        """
+        Условие «строка идёт после ключа key» в порядке сортировки.
+
+        Для ключа (a, b) и убывающего порядка это
+        a < key_a OR (a = key_a AND b < key_b).
+        """
+        condition = Q()
+        bound = None
+        for position in reversed(range(len(self.fields))):
+            name = self.fields[position]
+            descending = self.ordering[position].startswith('-')
+            if descending != reverse:
+                lookup = 'lt'
+            else:
+                lookup = 'gt'
+            if position == 0:
+                bound = lookup
+            last = position == len(self.fields) - 1
+            if last and inclusive:
+                lookup += 'e'
+            strict = Q(**{f'{name}__{lookup}': key[position]})
+            if last:
+                condition = strict
+            else:
+                condition = strict | (
+                    Q(**{name: key[position]}) & condition
+                )
+        if len(self.fields) > 1:
+            # Избыточная граница по первому полю позволяет СУБД
+            # начать чтение индекса сразу с нужного места.
+            condition &= Q(**{f'{self.fields[0]}__{bound}e': key[0]})
+        return condition
+
+    def _key_of(self, obj):
+        return [getattr(obj, name) for name in self.fields]
+
+    def _encode(self, key):
+        return signing.dumps(
+            [value if isinstance(value, int) else str(value)
+             for value in key],
+            salt=self.salt,
+            compress=True,
+        )
+
+    def _decode(self, cursor):
+        try:
+            key = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            raise Http404('Некорректный курсор страницы.')
+        if not isinstance(key, list) or len(key) != len(self.fields):
+            raise Http404('Некорректный курсор страницы.')
+        return key
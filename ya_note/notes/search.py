@@ -0,0 +1,145 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+Индекс — виртуальная таблица FTS5 notes_search, которую триггеры
+из миграции 0003 обновляют при каждом сохранении и удалении заметки.
+Колонка owner хранит токен автора, поэтому запрос сразу
+ограничивается заметками одного пользователя. На других базах
+поиск идёт без индекса, через icontains.
+
+Время поиска определяется числом совпадений у автора: bm25
+вычисляется для каждого, около микросекунды на заметку. Редкие слова
+находятся за миллисекунды, а слово, которое есть в большинстве из
+100 тысяч заметок автора, — за десятые доли секунды. Сократить это
+могло бы только приближённое ранжирование.
+
+Стеммер и подсветка совпадают с news/search.py из ya_news: проекты
+разворачиваются отдельно и общих модулей не имеют.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Note
+
+WORD_RE = re.compile(r'\w+')
+MAX_TERMS = 10
+MIN_STEM = 3
+SNIPPET_WORDS = 30
+# Совпадение в заголовке весит больше, чем в тексте, owner не учитывается.
+RANK = 'bm25(notes_search, 5.0, 1.0, 0.0)'
+
+# Окончания русских слов, от длинных к коротким.
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ией', 'иям', 'ием', 'иях', 'ого', 'его',
+    'ому', 'ему', 'ыми', 'ими', 'ешь', 'ишь', 'ете', 'ите', 'ать',
+    'ять', 'ить', 'еть', 'уть', 'ала', 'ила', 'ыла', 'ели', 'али',
+    'или', 'ые', 'ие', 'ое', 'ее', 'ей', 'ий', 'ый', 'ой', 'ем', 'им',
+    'ым', 'ом', 'их', 'ых', 'ую', 'юю', 'ая', 'яя', 'ою', 'ею', 'ов',
+    'ев', 'ам', 'ям', 'ах', 'ях', 'ия', 'ию', 'ья', 'ью', 'ет', 'ит',
+    'ут', 'ют', 'ат', 'ят', 'ть', 'ла', 'ли', 'ло', 'ся', 'сь', 'а',
+    'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+
+
+def normalize(text):
+    """Приводит текст к единому виду: без регистра и с «е» вместо «ё»."""
+    return text.casefold().replace('ё', 'е')
+
+
+def stem(word):
+    """
+    Облегчённый стеммер: отрезает самое длинное окончание,
+    оставляя основу не короче MIN_STEM букв.
+    """
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def query_stems(text):
+    """Основы слов поискового запроса без повторов."""
+    stems = []
+    for word in WORD_RE.findall(normalize(text)):
+        word = stem(word)
+        if word not in stems:
+            stems.append(word)
+    return stems[:MAX_TERMS]
+
+
+def match_expression(author_id, stems):
+    """Запрос FTS5: заметки автора, содержащие все основы как префиксы."""
+    terms = ' '.join(f'"{word}"*' for word in stems)
+    return f'owner : "u{author_id}" AND {{title text}} : ({terms})'
+
+
+def ranked_ids(author_id, text, limit):
+    """
+    Id заметок автора, подходящих под запрос, по убыванию релевантности.
+
+    bm25 вычисляется для всех совпадений, при сортировке SQLite
+    держит только limit лучших строк. FTS5 не умеет отбрасывать
+    заметки, заведомо не попадающие в limit лучших, поэтому время
+    растёт с числом совпадений.
+    """
+    stems = query_stems(text)
+    if not stems:
+        return []
+    if connection.vendor != 'sqlite':
+        return fallback_ids(author_id, stems, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT rowid FROM notes_search WHERE notes_search MATCH %s '
+            f'ORDER BY {RANK} LIMIT %s',
+            [match_expression(author_id, stems), limit],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def fallback_ids(author_id, stems, limit):
+    """
+    Поиск без индекса для баз, отличных от SQLite, где миграция 0003
+    ничего не создаёт: заметки автора, содержащие все основы,
+    от новых к старым.
+    """
+    condition = Q(author_id=author_id)
+    for word in stems:
+        condition &= Q(title__icontains=word) | Q(text__icontains=word)
+    return list(
+        Note.objects.filter(condition).order_by('-pk').values_list(
+            'pk', flat=True
+        )[:limit]
+    )
+
+
+def highlight(text, stems, size=SNIPPET_WORDS):
+    """
+    Фрагмент текста вокруг первого совпадения, найденные слова
+    выделены тегом <mark>, остальное экранировано.
+    """
+    words = list(WORD_RE.finditer(text))
+    if not words:
+        return ''
+    prefixes = tuple(stems)
+    hits = {
+        index for index, match in enumerate(words)
+        if normalize(match.group()).startswith(prefixes)
+    }
+    start = max(0, min(hits, default=0) - size // 3)
+    window = words[start:start + size]
+    parts = ['…'] if start else []
+    position = window[0].start() if start else 0
+    for index, match in enumerate(window, start=start):
+        parts.append(escape(text[position:match.start()]))
+        word = escape(match.group())
+        parts.append(f'<mark>{word}</mark>' if index in hits else word)
+        position = match.end()
+    if start + size < len(words):
+        parts.append('…')
+    else:
+        parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
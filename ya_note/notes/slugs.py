@@ -0,0 +1,69 @@
+"""
+Подбор свободного slug для заметки.
+
+Slug строится из заголовка: сначала сам slug заголовка, а если он
+занят — он же с числовым суффиксом: «slug-2», «slug-3» и так далее.
+"""
+import re
+from functools import lru_cache
+
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from pytils import translit
+
+# Сколько последних заголовков помнит slugify.
+SLUGIFY_CACHE_SIZE = 4096
+# Место, оставляемое под суффикс «-N» при обрезке длинного slug.
+SUFFIX_RESERVE = 7
+# Slug для заголовков, из которых не получается ни одного символа.
+DEFAULT_SLUG = 'note'
+# Суффиксы длиннее не учитываются: число из десяти цифр может
+# не поместиться в IntegerField, и приведение на PostgreSQL упадёт.
+MAX_SUFFIX_DIGITS = 9
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify(title):
+    """
+    pytils.translit.slugify с запоминанием результатов.
+
+    Заголовки заметок часто повторяются, а транслитерация дорогая.
+    Статистику попаданий возвращает slugify.cache_info().
+    """
+    return translit.slugify(title)
+
+
+def slug_root(title, max_length):
+    return slugify(title)[:max_length] or DEFAULT_SLUG
+
+
+def allocate_slug(queryset, title, max_length):
+    """
+    Первый свободный в queryset slug для заголовка title.
+
+    Занятость slug и наибольший уже выданный числовой суффикс
+    вычисляются одним запросом по диапазону значений slug, который
+    читается по уникальному индексу.
+    """
+    root = slug_root(title, max_length)
+    # Все slug с суффиксом начинаются с одного и того же префикса,
+    # поэтому длинный корень обрезается с запасом под суффикс.
+    prefix = root[:max_length - SUFFIX_RESERVE] + '-'
+    # В диапазон попадают и slug других заголовков («spisok-pokupok»
+    # для «spisok»), приведение к числу применяется только к цифровым
+    # суффиксам разумной длины: PostgreSQL на остальных выдал бы ошибку.
+    suffixed = Q(
+        slug__gt=prefix,
+        slug__lt=prefix[:-1] + '.',
+        slug__regex=rf'^{re.escape(prefix)}[0-9]{{1,{MAX_SUFFIX_DIGITS}}}$',
+    )
+    stats = queryset.filter(Q(slug=root) | suffixed).aggregate(
+        exact=Count('pk', filter=Q(slug=root)),
+        last=Max(
+            Cast(Substr('slug', len(prefix) + 1), IntegerField()),
+            filter=~Q(slug=root),
+        ),
+    )
+    if not stats['exact']:
+        return root
+    return f'{prefix}{max(stats["last"] or 0, 1) + 1}'
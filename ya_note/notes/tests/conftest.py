@@ -0,0 +1,29 @@
+import pytest
+from django.conf import settings
+
+from yanote.auth import user_cache
+from yanote.middleware import view_queries
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Закэшированные пользователи не должны переходить из теста в тест."""
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def query_budget():
+    """Проваливает тест, если представление превысило бюджет запросов
+    из настройки QUERY_BUDGETS.
+    """
+    def check_budget(view_name, count, **kwargs):
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        assert budget is None or count <= budget, (
+            f'{view_name}: {count} SQL-запросов при бюджете {budget}'
+        )
+
+    view_queries.connect(check_budget)
+    yield
+    view_queries.disconnect(check_budget)
@@ -0,0 +1,22 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from notes.models import Note, User
+
+
+class TestCommands(TestCase):
+
+    def test_seed_load(self):
+        """Команда seed_load создаёт пользователей и заметки
+        с уникальными slug.
+        """
+        call_command(
+            'seed_load', users=3, notes=50, batch_size=7, stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Note.objects.count(), 50)
+        self.assertEqual(
+            Note.objects.values('slug').distinct().count(), 50
+        )
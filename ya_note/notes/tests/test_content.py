@@ -1,9 +1,24 @@
-from django.test import Client, TestCase
+from http import HTTPStatus
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    Client,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.urls import reverse
 
+from notes.async_views import notes_list
 from notes.constance import NOTES_LIST
 from notes.forms import NoteForm
 from notes.models import Note, User
+from yanote.auth import user_cache
+from yanote.middleware import QueryCounter, view_queries
 
 
 class TestContent(TestCase):
@@ -34,6 +49,31 @@ class TestContent(TestCase):
         notes_count = response.context['object_list'].count()
         self.assertEqual(notes_count, 0)
 
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_notes_list_pages(self):
+        """Курсорные страницы списка перечисляют все заметки автора
+        по порядку, текст заметок не загружается.
+        """
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note_{index}', author=self.author)
+            for index in range(4)
+        )
+        seen, params = [], {}
+        while True:
+            response = self.user_client.get(NOTES_LIST, params)
+            page = response.context['page_obj']
+            for note in response.context['object_list']:
+                self.assertIn('text', note.get_deferred_fields())
+                seen.append(note.pk)
+            if not page.has_next():
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(seen, list(
+            Note.objects.filter(author=self.author).order_by('id')
+            .values_list('id', flat=True)
+        ))
+
     def test_authorized_client_has_form(self):
         """На страницы создания и редактирования заметки передаются формы."""
         urls = (
@@ -45,3 +85,118 @@ class TestContent(TestCase):
                 response = self.user_client.get(reverse(url, args=args))
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    def test_query_count_is_logged(self):
+        """Число SQL-запросов представления пишется в лог."""
+        with self.assertLogs('yanote.queries', level='INFO') as logs:
+            self.user_client.get(NOTES_LIST)
+        self.assertIn('"view": "notes:list"', logs.output[0])
+
+    def test_search_is_scoped_and_ranked(self):
+        """Поиск находит формы слов только среди заметок автора,
+        совпадение в заголовке выше совпадения в тексте.
+        """
+        in_text = Note.objects.create(
+            title='Покупки', text='Купить ёлочные игрушки',
+            slug='in_text', author=self.author
+        )
+        in_title = Note.objects.create(
+            title='Игрушка для кота', text='Мяч',
+            slug='in_title', author=self.author
+        )
+        Note.objects.create(
+            title='Игрушки', text='Чужие', slug='alien', author=self.reader
+        )
+        response = self.user_client.get(
+            reverse('notes:search'), {'q': 'игрушками'}
+        )
+        self.assertEqual(
+            response.context['object_list'], [in_title, in_text]
+        )
+        self.assertContains(response, '<mark>игрушки</mark>')
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении заметки."""
+        url = reverse('notes:search')
+        self.note.text = 'Новый рецепт пирога'
+        self.note.save()
+        response = self.user_client.get(url, {'q': 'пирог'})
+        self.assertEqual(response.context['object_list'], [self.note])
+        self.note.delete()
+        response = self.user_client.get(url, {'q': 'пирог'})
+        self.assertEqual(response.context['object_list'], [])
+
+    @override_settings(NOTES_SEARCH_LIMIT=1)
+    def test_search_ranks_all_matches(self):
+        """Старое совпадение в заголовке выше новых совпадений в тексте."""
+        best = Note.objects.create(
+            title='Пирог', text='Мука', slug='best', author=self.author
+        )
+        for index in range(3):
+            Note.objects.create(
+                title='Рецепт', text='Пирог с яблоками',
+                slug=f'newer_{index}', author=self.author
+            )
+        response = self.user_client.get(
+            reverse('notes:search'), {'q': 'пирог'}
+        )
+        self.assertEqual(response.context['object_list'], [best])
+
+    def test_search_without_full_text_index(self):
+        """На базах без FTS5 поиск работает без индекса."""
+        Note.objects.create(
+            title='Игрушки', text='Чужие', slug='alien', author=self.reader
+        )
+        found = Note.objects.create(
+            title='Покупки', text='Купить игрушки',
+            slug='found', author=self.author
+        )
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            response = self.user_client.get(
+                reverse('notes:search'), {'q': 'игрушками'}
+            )
+        self.assertEqual(response.context['object_list'], [found])
+
+    def test_queries_are_counted_under_asgi(self):
+        """Под ASGI запросы к базе из потоков sync_to_async считаются
+        так же, как под WSGI.
+        """
+        async_client = AsyncClient()
+        async_client.force_login(self.author)
+        counts = []
+
+        def collect(count, **kwargs):
+            counts.append(count)
+
+        async def get_list():
+            return await async_client.get(NOTES_LIST)
+
+        view_queries.connect(collect)
+        try:
+            user_cache.clear()
+            self.user_client.get(NOTES_LIST)
+            user_cache.clear()
+            async_to_sync(get_list)()
+        finally:
+            view_queries.disconnect(collect)
+        self.assertGreater(counts[0], 0)
+        self.assertEqual(counts[1], counts[0])
+
+
+class TestAsyncViews(TransactionTestCase):
+
+    def test_notes_list_renders_in_executor(self):
+        """Асинхронный список заметок отдаёт отрисованную страницу,
+        а запросы из пула потоков попадают в счётчик запроса.
+        """
+        author = User.objects.create(username='Я')
+        Note.objects.create(
+            title='Заголовок', text='Текст', slug='i_5', author=author
+        )
+        request = RequestFactory().get(NOTES_LIST)
+        request.user = author
+        request.query_counter = QueryCounter()
+        response = async_to_sync(notes_list)(request)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('Заголовок', response.content.decode())
+        self.assertEqual(request.query_counter.count, 1)
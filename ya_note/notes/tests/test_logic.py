@@ -1,14 +1,23 @@
+import io
+import zipfile
 from http import HTTPStatus
+from unittest import mock
 
-from django.test import Client, TestCase
+from django.contrib.auth import HASH_SESSION_KEY
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
-from pytils.translit import slugify
 
 from notes.constance import NOTES_SUCCESS
 from notes.forms import WARNING
 from notes.models import Note, User
+from notes.slugs import slugify
+from yanote.auth import user_cache
 
 
+# Счётчики запросов рассчитаны на сессии в кэше. Тесты идут в одном
+# процессе, поэтому LocMemCache для этого годится.
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
 class TestLogic(TestCase):
 
     @classmethod
@@ -38,6 +47,11 @@ class TestLogic(TestCase):
         )
         cls.start_notes_count = Note.objects.count()
 
+    def setUp(self):
+        # setUpTestData уже запомнил автора, а счётчики запросов
+        # не должны зависеть от порядка тестов и способа их запуска.
+        user_cache.clear()
+
     def add_post(self, note_data):
         return self.user_client.post(
             reverse('notes:add'), data=note_data
@@ -84,6 +98,65 @@ class TestLogic(TestCase):
         expected_slug = slugify(self.second_note['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
+    def test_empty_slug_is_deduplicated(self):
+        """Совпадающие заголовки получают slug с суффиксами -2, -3."""
+        self.second_note.pop('slug')
+        for _ in range(3):
+            self.add_post(self.second_note)
+        root = slugify(self.second_note['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                slug__startswith=root
+            ).values_list('slug', flat=True)),
+            {root, f'{root}-2', f'{root}-3'},
+        )
+
+    def test_slug_suffix_ignores_other_slugs(self):
+        """
+        Slug других заголовков с тем же началом и слишком длинные
+        числовые суффиксы не сбивают суффикс.
+        """
+        root = slugify(self.second_note['title'])
+        for slug in (
+            root, f'{root}-3', f'{root}-5abc', f'{root}-pokupok',
+            f'{root}-{"9" * 20}',
+        ):
+            Note.objects.create(
+                title='Другая', text='Текст', slug=slug, author=self.author
+            )
+        note = Note.objects.create(
+            title=self.second_note['title'], text='Текст', author=self.author
+        )
+        self.assertEqual(note.slug, f'{root}-4')
+
+    def test_long_slug_is_truncated(self):
+        """Slug длинного заголовка с суффиксом умещается в 100 символов."""
+        title = 'Очень длинный заголовок ' * 5
+        first = Note.objects.create(title=title, text='1', author=self.author)
+        second = Note.objects.create(title=title, text='2', author=self.author)
+        self.assertEqual(first.slug, slugify(title)[:100])
+        self.assertTrue(second.slug.endswith('-2'))
+        self.assertLessEqual(len(second.slug), 100)
+
+    def test_slugify_is_memoized(self):
+        """Повторный заголовок транслитерируется из кэша."""
+        slugify.cache_clear()
+        for _ in range(3):
+            slugify(self.second_note['title'])
+        info = slugify.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 1))
+
+    def test_slug_race_is_retried(self):
+        """Если slug успел занять другой запрос, подбирается новый."""
+        with mock.patch(
+            'notes.models.allocate_slug',
+            side_effect=[self.first_note['slug'], 'free_slug'],
+        ):
+            note = Note.objects.create(
+                title='Гонка', text='Текст', author=self.author
+            )
+        self.assertEqual(note.slug, 'free_slug')
+
     def test_author_can_edit_note(self):
         """Автор может редактировать свои заметки"""
         response = self.user_client.post(self.edit_note_url, self.second_note)
@@ -112,3 +185,180 @@ class TestLogic(TestCase):
         response = self.other_client.post(url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertEqual(Note.objects.count(), self.start_notes_count)
+
+    def test_export_import_round_trip(self):
+        """Выгрузка заметок загружается обратно в обоих форматах."""
+        for file_format in ('jsonl', 'zip'):
+            with self.subTest(file_format=file_format):
+                response = self.user_client.get(
+                    reverse('notes:export'), {'format': file_format}
+                )
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content)
+                Note.objects.all().delete()
+                self.user_client.post(reverse('notes:import'), data={
+                    'file': SimpleUploadedFile(f'notes.{file_format}', content)
+                })
+                self.assert_note(self.first_note)
+                self.assertEqual(Note.objects.count(), self.start_notes_count)
+
+    def test_import_reports_errors(self):
+        """
+        Импорт пропускает занятые slug и ошибочные записи,
+        а для пустого slug подбирает свободный.
+        """
+        content = '\n'.join((
+            '{"title": "Заголовок", "text": "Текст", "slug": "i_5"}',
+            '{"title": "Заголовок", "text": "Текст", "slug": ""}',
+            '{"title": "", "text": "Текст", "slug": "empty"}',
+            'не json',
+        )).encode()
+        response = self.user_client.post(reverse('notes:import'), data={
+            'file': SimpleUploadedFile('notes.jsonl', content)
+        })
+        result = response.context['result']
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.error_count, 3)
+        self.assertTrue(
+            Note.objects.filter(slug=slugify('Заголовок')).exists()
+        )
+        self.assertEqual(Note.objects.count(), self.start_notes_count + 1)
+
+    @override_settings(NOTES_IMPORT_MAX_FILE_SIZE=100)
+    def test_import_skips_oversized_zip_files(self):
+        """Слишком большой после распаковки файл архива не читается."""
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('small.md', '# Заголовок\n\nТекст')
+            archive.writestr('big.md', '# Заголовок\n\n' + 'а' * 1000)
+        response = self.user_client.post(reverse('notes:import'), data={
+            'file': SimpleUploadedFile('notes.zip', content.getvalue())
+        })
+        result = response.context['result']
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.error_count, 1)
+        self.assertIn('big.md', result.errors[0])
+        self.assertFalse(Note.objects.filter(slug='big').exists())
+
+    def batch_post(self, client, *operations):
+        return client.post(
+            reverse('notes:batch'),
+            data={'operations': operations},
+            content_type='application/json',
+        )
+
+    def test_batch_api(self):
+        """Пакет операций применяется целиком в одной транзакции."""
+        extra = Note.objects.create(
+            title='Лишняя', text='Текст', slug='extra', author=self.author
+        )
+        # Пользователь, заметки пакета, slug, затем только запись.
+        with self.assertNumQueries(12):
+            response = self.batch_post(
+                self.user_client,
+                {'op': 'create', 'data': self.second_note},
+                {'op': 'create', 'data': {'title': 'Новая', 'text': 'Т'}},
+                {'op': 'update', 'slug': self.first_note['slug'],
+                 'data': {**self.second_note, 'slug': self.first_note['slug'],
+                          'text': 'Новый текст'}},
+                {'op': 'delete', 'slug': extra.slug},
+            )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [item['status'] for item in response.json()['results']],
+            ['created', 'created', 'updated', 'deleted'],
+        )
+        self.assert_note(self.second_note)
+        self.assert_note({**self.first_note, 'text': 'Новый текст'})
+        self.assertTrue(Note.objects.filter(slug=slugify('Новая')).exists())
+        self.assertFalse(Note.objects.filter(pk=extra.pk).exists())
+
+    def test_batch_api_rejects_invalid_batch(self):
+        """Ошибка в одной операции отклоняет весь пакет."""
+        response = self.batch_post(
+            self.user_client,
+            {'op': 'create', 'data': self.second_note},
+            {'op': 'create', 'data': self.second_note},
+            {'op': 'create', 'data': {
+                **self.second_note, 'slug': self.first_note['slug']
+            }},
+            {'op': 'create', 'data': {'title': 'Без текста'}},
+            {'op': 'delete', 'slug': 'missing'},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        results = response.json()['results']
+        self.assertEqual(results[0], {'status': 'valid'})
+        for index, field in ((1, 'slug'), (2, 'slug'), (3, 'text')):
+            with self.subTest(index=index):
+                self.assertIn(field, results[index]['errors'])
+        self.assertIn('__all__', results[4]['errors'])
+        self.assertEqual(Note.objects.count(), self.start_notes_count)
+
+    def test_batch_api_is_scoped_to_author(self):
+        """Через API нельзя изменить чужую заметку или работать анонимно."""
+        response = self.batch_post(
+            self.other_client,
+            {'op': 'delete', 'slug': self.first_note['slug']},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.batch_post(
+            self.client,
+            {'op': 'create', 'data': self.second_note},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        self.assertEqual(Note.objects.count(), self.start_notes_count)
+
+    def test_write_queries(self):
+        """
+        Запись заметки не читает объект и не сохраняет его повторно.
+
+        Сессия и пользователь берутся из кэша.
+        """
+        self.user_client.get(reverse('notes:home'))
+        cases = (
+            (reverse('notes:add'), self.second_note, 2),
+            (self.edit_note_url, self.first_note, 3),
+            (reverse('notes:delete', args=(self.first_note['slug'],)), {}, 2),
+        )
+        for url, data, queries in cases:
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                self.user_client.post(url, data=data)
+
+    def test_user_is_cached_until_changed(self):
+        """
+        Пользователь читается из базы один раз, смена пароля
+        и выход из системы сбрасывают кэш.
+        """
+        url = reverse('notes:home')
+        with self.assertNumQueries(1):
+            self.user_client.get(url)
+        with self.assertNumQueries(0):
+            self.user_client.get(url)
+        self.author.set_password('новый пароль')
+        self.author.save()
+        self.assertIsNone(user_cache.get(self.author.pk))
+        self.other_client.get(url)
+        self.other_client.post(reverse('users:logout'))
+        self.assertIsNone(user_cache.get(self.reader.pk))
+
+    def test_password_changed_elsewhere_keeps_session(self):
+        """
+        Пользователь, сменивший пароль в другом процессе, остаётся
+        в системе: устаревшая запись кэша перечитывается из базы.
+        """
+        url = reverse('notes:home')
+        # Своя сессия: общая сессия класса живёт в кэше и не
+        # откатывается вместе с базой.
+        client = Client()
+        client.force_login(self.author)
+        client.get(url)
+        self.author.set_password('новый пароль')
+        User.objects.filter(pk=self.author.pk).update(
+            password=self.author.password
+        )
+        session = client.session
+        session[HASH_SESSION_KEY] = self.author.get_session_auth_hash()
+        session.save()
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertTrue(response.context['user'].is_authenticated)
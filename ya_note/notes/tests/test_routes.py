@@ -27,6 +27,9 @@ class TestRoutes(TestCase):
             ('notes:list', None),
             ('notes:add', None),
             ('notes:success', None),
+            ('notes:search', None),
+            ('notes:export', None),
+            ('notes:import', None),
             *cls.urls_with_args
         )
 
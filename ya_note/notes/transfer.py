@@ -0,0 +1,203 @@
+"""
+Перенос заметок пользователя: потоковый экспорт и пакетный импорт.
+
+Поддерживаются два формата:
+- jsonl — по объекту {"title", "text", "slug"} в строке;
+- zip — архив файлов «<slug>.md», первая строка файла — «# заголовок»,
+  после пустой строки идёт текст.
+"""
+import io
+import json
+import zipfile
+from itertools import islice
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Note
+
+FORMATS = ('jsonl', 'zip')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'zip': 'application/zip',
+}
+EXPORT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Поток только для записи, из которого можно забрать накопленное.
+
+    У потока нет seek() и tell(), поэтому zipfile пишет архив
+    последовательно, и его можно отдавать клиенту по частям.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def export_rows(queryset):
+    return queryset.order_by('id').values_list(
+        'title', 'text', 'slug'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def export_jsonl(queryset):
+    """Построчно отдаёт заметки в формате JSONL."""
+    for title, text, slug in export_rows(queryset):
+        yield json.dumps(
+            {'title': title, 'text': text, 'slug': slug}, ensure_ascii=False
+        ).encode() + b'\n'
+
+
+def export_zip(queryset):
+    """Отдаёт zip-архив Markdown-файлов по мере его построения."""
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for title, text, slug in export_rows(queryset):
+            archive.writestr(f'{slug}.md', f'# {title}\n\n{text}')
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError('ожидался объект JSON')
+        except ValueError as error:
+            yield number, error
+        else:
+            yield number, record
+
+
+def read_zip(file):
+    """
+    Заметки из Markdown-файлов архива.
+
+    Размер файла после распаковки проверяется по заголовку архива
+    до чтения: zipfile не распакует больше объявленного размера,
+    поэтому архив с огромным файлом не займёт всю память.
+    """
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile as error:
+        yield 1, error
+        return
+    with archive:
+        for number, info in enumerate(archive.infolist(), start=1):
+            path = PurePosixPath(info.filename)
+            if info.is_dir() or path.suffix != '.md':
+                continue
+            if info.file_size > settings.NOTES_IMPORT_MAX_FILE_SIZE:
+                yield number, ValueError(
+                    f'файл {info.filename} больше '
+                    f'{settings.NOTES_IMPORT_MAX_FILE_SIZE} байт'
+                )
+                continue
+            try:
+                content = archive.read(info).decode()
+            except (UnicodeDecodeError, zipfile.BadZipFile) as error:
+                yield number, error
+                continue
+            title, _, text = content.partition('\n')
+            if title.startswith('# '):
+                title = title[2:]
+            yield number, {
+                'title': title.strip(),
+                'text': text[1:] if text.startswith('\n') else text,
+                'slug': path.stem,
+            }
+
+
+class NoteImporter:
+    """
+    Загружает заметки автора пакетами.
+
+    Каждая заметка проверяется теми же правилами полей, что и в форме,
+    а занятость slug — одним запросом на пакет. Заметки с указанным
+    slug записываются через bulk_create, без slug — через Note.save,
+    который подбирает свободный адрес.
+    """
+
+    def __init__(self, author, batch_size):
+        self.author = author
+        self.batch_size = batch_size
+        self.created = 0
+        self.errors = []
+        self.error_count = 0
+
+    def run(self, file, file_format):
+        reader = read_zip if file_format == 'zip' else read_jsonl
+        notes = self.build_all(reader(file))
+        while True:
+            batch = list(islice(notes, self.batch_size))
+            if not batch:
+                break
+            self.write_batch(batch)
+        return self
+
+    def build_all(self, records):
+        for number, record in records:
+            if isinstance(record, Exception):
+                self.error(number, record)
+                continue
+            try:
+                yield number, self.build(record)
+            except (ValidationError, TypeError) as error:
+                self.error(number, error)
+
+    def build(self, record):
+        note = Note(
+            title=record.get('title') or '',
+            text=record.get('text') or '',
+            slug=record.get('slug') or '',
+            author=self.author,
+        )
+        note.full_clean(exclude=('author',), validate_unique=False)
+        return note
+
+    def write_batch(self, batch):
+        slugs = [note.slug for _, note in batch if note.slug]
+        taken = set(Note.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', flat=True))
+        to_create, to_save = [], []
+        for number, note in batch:
+            if not note.slug:
+                to_save.append(note)
+            elif note.slug in taken:
+                self.error(number, f'slug {note.slug} уже занят')
+            else:
+                taken.add(note.slug)
+                to_create.append(note)
+        with transaction.atomic():
+            Note.objects.bulk_create(to_create)
+            for note in to_save:
+                note.save()
+        self.created += len(to_create) + len(to_save)
+
+    def error(self, number, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            if isinstance(error, ValidationError):
+                error = '; '.join(error.messages)
+            self.errors.append(f'Запись {number}: {error}')
@@ -1,15 +1,26 @@
+from django.conf import settings
 from django.urls import path
 
 from notes import views
 
 app_name = 'notes'
 
+if settings.ASYNC_VIEWS:
+    from notes.async_views import note_detail, notes_list
+else:
+    note_detail = views.NoteDetail.as_view()
+    notes_list = views.NotesList.as_view()
+
 urlpatterns = [
     path('', views.Home.as_view(), name='home'),
     path('add/', views.NoteCreate.as_view(), name='add'),
     path('edit/<slug:slug>/', views.NoteUpdate.as_view(), name='edit'),
-    path('note/<slug:slug>/', views.NoteDetail.as_view(), name='detail'),
+    path('note/<slug:slug>/', note_detail, name='detail'),
     path('delete/<slug:slug>/', views.NoteDelete.as_view(), name='delete'),
-    path('notes/', views.NotesList.as_view(), name='list'),
+    path('notes/', notes_list, name='list'),
+    path('search/', views.NoteSearch.as_view(), name='search'),
+    path('export/', views.NoteExport.as_view(), name='export'),
+    path('import/', views.NoteImport.as_view(), name='import'),
+    path('api/batch/', views.NoteBatchApi.as_view(), name='batch'),
     path('done/', views.NoteSuccess.as_view(), name='success'),
 ]
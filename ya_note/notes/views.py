@@ -1,9 +1,23 @@
+from http import HTTPStatus
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from .batch import BatchError, NoteBatch, parse_operations
+from .forms import NoteForm, NoteImportForm
 from .models import Note
+from .pagination import CursorPaginator
+from .search import highlight, query_stems, ranked_ids
+from .transfer import (
+    CONTENT_TYPES,
+    FORMATS,
+    NoteImporter,
+    export_jsonl,
+    export_zip,
+)
 
 
 class Home(generic.TemplateView):
@@ -16,7 +30,22 @@ class NoteSuccess(LoginRequiredMixin, generic.TemplateView):
     template_name = 'notes/success.html'
 
 
-class NoteBase(LoginRequiredMixin):
+class CachedObjectMixin:
+    """
+    Запоминает объект, найденный get_object(), до конца запроса.
+
+    Повторные вызовы get_object() не выполняют запрос к базе ещё раз.
+    """
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_cached_object'):
+            self._cached_object = super().get_object()
+        return self._cached_object
+
+
+class NoteBase(LoginRequiredMixin, CachedObjectMixin):
     """Базовый класс для остальных CBV."""
     model = Note
     success_url = reverse_lazy('notes:success')
@@ -32,9 +61,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -52,8 +79,124 @@ class NoteDelete(NoteBase, generic.DeleteView):
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
+    ordering = ('id',)
+
+    def get_queryset(self):
+        """Списку нужны только id, slug и title, текст не читается."""
+        return super().get_queryset().only('id', 'slug', 'title')
+
+    def get_paginate_by(self, queryset):
+        """Количество заметок на странице определяется в настройках."""
+        return settings.NOTES_COUNT_ON_PAGE
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return CursorPaginator(queryset, self.ordering, per_page, 'notes.list')
+
+    def paginate_queryset(self, queryset, page_size):
+        """Курсорная пагинация по id."""
+        paginator = self.get_paginator(queryset, page_size)
+        page = paginator.get_page(
+            after=self.request.GET.get('after'),
+            before=self.request.GET.get('before'),
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
 
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NoteSearch(NoteBase, generic.ListView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_queryset(self):
+        """
+        Заметки в порядке релевантности. Индекс отдаёт только id,
+        сами заметки читаются через NoteBase.get_queryset.
+        """
+        self.query = self.request.GET.get('q', '').strip()
+        ids = ranked_ids(
+            self.request.user.pk,
+            self.query,
+            settings.NOTES_SEARCH_LIMIT,
+        )
+        if not ids:
+            return []
+        notes = super().get_queryset().in_bulk(ids)
+        stems = query_stems(self.query)
+        found = []
+        for pk in ids:
+            if pk in notes:
+                note = notes[pk]
+                note.title_highlight = highlight(note.title, stems)
+                note.snippet = highlight(note.text, stems)
+                found.append(note)
+        return found
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
+
+
+class NoteExport(NoteBase, generic.View):
+    """Потоковая выгрузка всех заметок пользователя."""
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get('format', 'jsonl')
+        if file_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        export = export_zip if file_format == 'zip' else export_jsonl
+        response = StreamingHttpResponse(
+            export(self.get_queryset()),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{file_format}"'
+        )
+        return response
+
+
+class NoteImport(NoteBase, generic.FormView):
+    """Загрузка заметок из выгрузки."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        file = form.cleaned_data['file']
+        result = NoteImporter(
+            self.request.user, settings.NOTES_IMPORT_BATCH_SIZE
+        ).run(file, form.get_format(file))
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+
+class NoteBatchApi(NoteBase, generic.View):
+    """
+    JSON API для пакетного создания, изменения и удаления заметок.
+
+    Если хотя бы одна операция не проходит проверку, пакет целиком
+    отклоняется с кодом 400 и ошибками по каждой операции.
+    """
+    raise_exception = True
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        try:
+            operations = parse_operations(
+                request.body, settings.NOTES_BATCH_MAX_SIZE
+            )
+        except BatchError as error:
+            return JsonResponse(
+                {'error': str(error)}, status=HTTPStatus.BAD_REQUEST
+            )
+        batch = NoteBatch(self.get_queryset(), request.user, operations)
+        if not batch.is_valid():
+            return JsonResponse(
+                {'results': batch.results}, status=HTTPStatus.BAD_REQUEST
+            )
+        batch.apply()
+        return JsonResponse({'results': batch.results})
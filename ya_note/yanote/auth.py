@@ -0,0 +1,130 @@
+"""
+Бэкенд аутентификации с кэшем пользователей в памяти процесса.
+
+AuthenticationMiddleware на каждый запрос вызывает get_user() бэкенда,
+и ModelBackend каждый раз читает пользователя из базы.
+CachedModelBackend помнит прочитанных пользователей
+AUTH_USER_CACHE_TIMEOUT секунд.
+
+Запись сбрасывается при сохранении пользователя (в том числе при смене
+пароля и входе в систему), при его удалении и при выходе из системы.
+Другие процессы узнают об изменении не позже чем через
+AUTH_USER_CACHE_TIMEOUT секунд. Исключение — смена пароля самим
+пользователем: update_session_auth_hash() записывает в его сессию
+новый хэш, и CachedAuthenticationMiddleware, найдя в кэше процесса
+пользователя со старым паролем, перечитывает его из базы, а не
+завершает сессию.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+class UserCache:
+    """Пользователи по id с ограниченным временем жизни записи."""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Полная копия запомненного пользователя: ни атрибуты, которые
+        запрос вешает на request.user, ни его _state с кэшем связанных
+        объектов не попадают в другие запросы.
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return copy.deepcopy(entry[1])
+
+    def set(self, user_id, user):
+        expires = time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT
+        with self._lock:
+            self._users.pop(user_id, None)
+            if len(self._users) >= settings.AUTH_USER_CACHE_SIZE:
+                # Словарь хранит порядок вставки, первым вытесняется
+                # самый давно запомненный пользователь.
+                del self._users[next(iter(self._users))]
+            self._users[user_id] = (expires, copy.deepcopy(user))
+
+    def forget_stale(self, user_id, session_hash):
+        """Удаляет запись, если пароль в ней не совпадает с сессией."""
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and not constant_time_compare(
+                entry[1].get_session_auth_hash(), session_hash
+            ):
+                del self._users[user_id]
+
+    def delete(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который читает пользователя из кэша процесса."""
+
+    def get_user(self, user_id):
+        if settings.AUTH_USER_CACHE_TIMEOUT <= 0:
+            return super().get_user(user_id)
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                user_cache.set(user_id, user)
+        return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        session_hash = request.session.get(auth.HASH_SESSION_KEY)
+        if session_hash and auth.SESSION_KEY in request.session:
+            user_cache.forget_stale(
+                auth._get_user_session_key(request), session_hash
+            )
+        request._cached_user = auth.get_user(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware, который перед проверкой хэша пароля
+    в сессии сбрасывает устаревшую запись кэша пользователей.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+
+
+# Обработчики подключаются при импорте модуля, то есть при первом
+# обращении к бэкенду: до этого кэш пуст и сбрасывать в нём нечего.
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    user_cache.delete(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_left(sender, request, user, **kwargs):
+    if user is not None:
+        user_cache.delete(user.pk)
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal, receiver
+
+logger = logging.getLogger('yanote.queries')
+
+# Отправляется после каждого запроса с полями request, view_name, count
+# и duration.
+view_queries = Signal()
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper, считающая SQL-запросы."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# Счётчик текущего запроса. sync_to_async копирует контекст в поток,
+# где выполняет синхронный код, поэтому под ASGI запросы к базе
+# из промежуточных слоёв и синхронных представлений попадают
+# в счётчик своего запроса.
+current_counter = ContextVar('query_counter', default=None)
+
+
+def count_into_current(execute, sql, params, many, context):
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+def install_counter(connection):
+    """
+    Подключает к соединению постоянную обёртку count_into_current.
+
+    Обёртка ставится первой: connection.execute_wrapper() снимает
+    последнюю обёртку списка, и подключённые позже временные обёртки
+    не снимут её.
+    """
+    if count_into_current not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_into_current)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_counter(connection)
+
+
+@contextmanager
+def count_queries(counter):
+    """
+    Направляет в counter запросы к базе, выполненные в текущем
+    контексте, в том числе из потоков sync_to_async.
+    """
+    for connection in connections.all():
+        install_counter(connection)
+    token = current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        current_counter.reset(token)
+
+
+class QueryCountMiddleware:
+    """
+    Считает SQL-запросы и их суммарное время для каждого запроса.
+
+    В режиме отладки результат отдаётся в заголовках X-Query-Count
+    и X-Query-Time, иначе пишется в лог в виде JSON. Превышение
+    бюджета из настройки QUERY_BUDGETS логируется как предупреждение.
+
+    Счётчик доступен представлениям как request.query_counter.
+    Под ASGI он передаётся в потоки sync_to_async вместе с контекстом,
+    представления со своим пулом потоков подключают его там через
+    count_queries().
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Помечает экземпляр как корутинную функцию для Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request.query_counter = QueryCounter()
+        with count_queries(request.query_counter):
+            response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request):
+        request.query_counter = QueryCounter()
+        with count_queries(request.query_counter):
+            response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        counter = request.query_counter
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        view_queries.send(
+            sender=self.__class__,
+            request=request,
+            view_name=view_name,
+            count=counter.count,
+            duration=counter.duration,
+        )
+        if settings.DEBUG:
+            response['X-Query-Count'] = counter.count
+            response['X-Query-Time'] = f'{counter.duration * 1000:.2f}ms'
+        else:
+            logger.info(json.dumps({
+                'view': view_name,
+                'method': request.method,
+                'status': response.status_code,
+                'queries': counter.count,
+                'sql_ms': round(counter.duration * 1000, 2),
+            }))
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                'View %s ran %d queries, budget is %d',
+                view_name, counter.count, budget
+            )
+        return response
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 from django.urls import reverse_lazy
@@ -22,11 +23,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yanote.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yanote.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,3 +89,85 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+
+# Количество заметок в одном пакете импорта.
+NOTES_IMPORT_BATCH_SIZE = 1000
+# Наибольший размер файла заметки в zip-архиве после распаковки,
+# в байтах. Файлы крупнее пропускаются с ошибкой импорта.
+NOTES_IMPORT_MAX_FILE_SIZE = 1024 * 1024
+# Наибольшее число операций в одном запросе к notes:batch.
+NOTES_BATCH_MAX_SIZE = 100
+
+# Наибольшее число заметок в результатах поиска.
+NOTES_SEARCH_LIMIT = 50
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'yanote.queries': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+# Общий для всех процессов кэш memcached, например 127.0.0.1:11211
+# (нужен пакет pymemcache). Без него у каждого процесса свой
+# LocMemCache.
+MEMCACHED_LOCATION = os.environ.get('DJANGO_MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        },
+    }
+
+# С общим кэшем сессии хранятся в кэше и в базе, база читается только
+# при промахе кэша. Без общего кэша сессия, удалённая при выходе
+# в одном процессе, оставалась бы в кэше других, поэтому сессии
+# читаются из базы. С django.contrib.sessions.backends.signed_cookies
+# сессия хранится в подписанной cookie и не требует ни кэша, ни базы.
+SESSION_ENGINE = os.environ.get(
+    'DJANGO_SESSION_ENGINE',
+    'django.contrib.sessions.backends.'
+    + ('cached_db' if MEMCACHED_LOCATION else 'db'),
+)
+
+AUTHENTICATION_BACKENDS = ['yanote.auth.CachedModelBackend']
+
+# Сколько секунд процесс помнит прочитанного из базы пользователя,
+# 0 отключает кэш.
+AUTH_USER_CACHE_TIMEOUT = 30
+# Наибольшее число пользователей в кэше процесса.
+AUTH_USER_CACHE_SIZE = 1000
+
+# Допустимое число SQL-запросов на один запрос к представлению.
+# Бюджет включает чтение сессии из базы и пользователя, если его нет
+# в кэше процесса.
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 4,
+    'notes:search': 5,
+    'notes:export': 2,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 6,
+    'notes:delete': 4,
+    'notes:success': 2,
+}
+
+# Асинхронные представления страниц включаются в asgi.py
+# через переменную окружения DJANGO_ASYNC_VIEWS.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
+# Размер пула потоков, в котором выполняются асинхронные представления.
+ASYNC_VIEWS_WORKERS = 8